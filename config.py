@@ -1,14 +1,33 @@
+import functools
 import logging
 import os
+import threading
 
-import colorlog
-import openai
-from dd_internal_authentication.client import (
-    JWTDDToolAuthClientTokenManager, JWTInternalServiceAuthClientTokenManager)
+# Environment lookups are resolved once at import; they don't change for the process lifetime
+_LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+_OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
+
+# DD_AUTH_ENV=production switches to internal service auth; anything else uses staging
+_LOCAL_AUTH = os.environ.get("DD_AUTH_ENV", "local").lower() != "production"
+_AI_GATEWAY_HOST = (
+    "https://ai-gateway.us1.staging.dog"
+    if _LOCAL_AUTH
+    else "http://ai-gateway.rapid-ai-platform.sidecar-proxy.fabric.dog.:15001"
+)
+
+_openai_client_lock = threading.Lock()
+
+# Sized for the concurrent per-file instrumentation fan-out
+_OPENAI_MAX_CONNECTIONS = 32
+_OPENAI_MAX_KEEPALIVE_CONNECTIONS = 16
+# The SDK retries 429s and 5xx with exponential backoff, honoring Retry-After
+_OPENAI_MAX_RETRIES = 4
 
 
 def setup_logging():
     """Configure application logging."""
+    import colorlog
+
     handler = colorlog.StreamHandler()
     handler.setFormatter(colorlog.ColoredFormatter(
         "%(log_color)s%(asctime)s | %(levelname)s | %(name)s | %(message)s",
@@ -22,7 +41,7 @@ def setup_logging():
     ))
 
     # Get log level from environment variable, default to INFO
-    log_level = os.getenv("LOG_LEVEL", "INFO").upper()
+    log_level = _LOG_LEVEL
 
     # Validate log level
     valid_levels = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
@@ -34,54 +53,82 @@ def setup_logging():
     logging.basicConfig(level=numeric_level, handlers=[handler])
 
     logger = logging.getLogger(__name__)
-    logger.info(f"Logging level set to {log_level}")
+    logger.info("Logging level set to %s", log_level)
 
     return logger
 
 
-def setup_openai_client():
-    """Configure and return OpenAI client."""
+def _get_token_manager():
+    """Return the DD internal auth token manager for the configured environment."""
+    from dd_internal_authentication.client import (
+        JWTDDToolAuthClientTokenManager,
+        JWTInternalServiceAuthClientTokenManager)
+
+    if _LOCAL_AUTH:
+        return JWTDDToolAuthClientTokenManager.instance(
+            name="rapid-ai-platform", datacenter="us1.staging.dog"
+        )
+    return JWTInternalServiceAuthClientTokenManager.instance(
+        name="rapid-ai-platform"
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _build_openai_client():
+    """Build the OpenAI client. Only ever invoked once via setup_openai_client."""
+    import httpx
+    import openai
+
     logger = logging.getLogger(__name__)
-    local = True # Switch based on environment
+
+    # One pooled HTTP client for every completion, so concurrent calls reuse warm keep-alive connections.
+    # HTTP/2 (negotiated over TLS, else HTTP/1.1) multiplexes concurrent completions over one connection.
+    http_client = openai.DefaultAsyncHttpxClient(
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=_OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=_OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+        )
+    )
 
     try:
-        if local:
-            logger.debug("Attempting to use DD internal auth (local/staging)")
-            token = JWTDDToolAuthClientTokenManager.instance(
-                name="rapid-ai-platform", datacenter="us1.staging.dog"
-            ).get_token("rapid-ai-platform")
-            host = "https://ai-gateway.us1.staging.dog"
-        else:
-            logger.debug("Attempting to use DD internal auth (production)")
-            token = JWTInternalServiceAuthClientTokenManager.instance(
-                name="rapid-ai-platform"
-            ).get_token("rapid-ai-platform")
-            host = "http://ai-gateway.rapid-ai-platform.sidecar-proxy.fabric.dog.:15001"
-
-        logger.info(f"Successfully configured DD internal auth, using host: {host}")
-        return openai.OpenAI(
+        logger.debug("Attempting to use DD internal auth (%s)", 'local/staging' if _LOCAL_AUTH else 'production')
+        token = _get_token_manager().get_token("rapid-ai-platform")
+
+        logger.info("Successfully configured DD internal auth, using host: %s", _AI_GATEWAY_HOST)
+        return openai.AsyncOpenAI(
             api_key=token,
-            base_url=f"{host}/v1",
+            base_url=f"{_AI_GATEWAY_HOST}/v1",
             default_headers={
                 "source": "dd-instrumenter-agent",
                 "org-id": "2",
             },
+            http_client=http_client,
+            max_retries=_OPENAI_MAX_RETRIES,
         )
     except (ImportError, AttributeError, Exception) as e:
-        logger.warning(f"DD internal auth failed: {e}")
+        logger.warning("DD internal auth failed: %s", e)
         logger.info("Falling back to OpenAI API key from environment")
 
-        api_key = os.getenv("OPENAI_API_KEY")
+        api_key = _OPENAI_API_KEY
         if not api_key:
             logger.error("No OPENAI_API_KEY found in environment variables")
             raise ValueError("No valid authentication method available - DD internal auth failed and no OPENAI_API_KEY set")
 
         logger.info("Successfully configured OpenAI client with API key")
-        return openai.OpenAI(
+        return openai.AsyncOpenAI(
             api_key=api_key,
-            base_url=f"{host}/v1",
+            base_url=f"{_AI_GATEWAY_HOST}/v1",
             default_headers={
                 "source": "dd-instrumenter-agent",
                 "org-id": "2",
             },
+            http_client=http_client,
+            max_retries=_OPENAI_MAX_RETRIES,
         )
+
+
+def setup_openai_client():
+    """Configure and return the async OpenAI client (a process-wide singleton, safe to call from any thread)."""
+    with _openai_client_lock:
+        return _build_openai_client()
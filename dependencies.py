@@ -1,32 +1,47 @@
+import asyncio
+import contextlib
+import functools
+import logging
+from typing import AsyncIterator, Dict, Iterator, Optional, Set
+
 from fastapi import HTTPException, Request
-from typing import Optional
 
 from llm.function_instrumenter import FunctionInstrumenter
 from llm.pr_description_generator import PRDescriptionGenerator
 from llm.repo_analyzer import RepoAnalyzer
 from util.document_retriever import DocumentRetriever
 from util.github_client import GithubClient
+from util.repo_parser import RepoParser
+
+logger = logging.getLogger(__name__)
+
+# Background aclose() calls for evicted clients, referenced until done so they aren't garbage collected
+_closing_clients: Set[asyncio.Task] = set()
+
+# Number of requests using each per-token client, and evicted clients waiting for those requests to finish
+_client_holds: Dict[GithubClient, int] = {}
+_close_pending: Set[GithubClient] = set()
 
 
 def get_repo_analyzer(request: Request) -> RepoAnalyzer:
-    """Dependency to get a configured RepoAnalyzer instance."""
+    """Dependency to get the shared RepoAnalyzer instance."""
     if not request.app.state.openai_client:
         raise HTTPException(status_code=503, detail="OpenAI client not configured.")
-    return RepoAnalyzer(request.app.state.openai_client)
+    return request.app.state.repo_analyzer
 
 
 def get_function_instrumenter(request: Request) -> FunctionInstrumenter:
-    """Dependency to get a configured FunctionInstrumenter instance."""
+    """Dependency to get the shared FunctionInstrumenter instance."""
     if not request.app.state.openai_client:
         raise HTTPException(status_code=503, detail="OpenAI client not configured.")
-    return FunctionInstrumenter(request.app.state.openai_client)
+    return request.app.state.function_instrumenter
 
 
 def get_pr_description_generator(request: Request) -> PRDescriptionGenerator:
-    """Dependency to get a configured PRDescriptionGenerator instance."""
+    """Dependency to get the shared PRDescriptionGenerator instance."""
     if not request.app.state.openai_client:
         raise HTTPException(status_code=503, detail="OpenAI client not configured.")
-    return PRDescriptionGenerator(request.app.state.openai_client)
+    return request.app.state.pr_description_generator
 
 
 def get_user_token(request: Request) -> Optional[str]:
@@ -38,12 +53,105 @@ def get_user_token(request: Request) -> Optional[str]:
     return None
 
 
-def get_github_client(request: Request) -> GithubClient:
-    """Dependency to get a configured GithubClient instance with user's OAuth token if available."""
+def close_github_client(access_token: str, client: GithubClient) -> None:
+    """
+    Close a per-token GithubClient evicted from the app's client store.
+
+    Used as the store's on_evict callback, so a client's connection pool is released
+    when its session expires, its token is discarded, or the store is cleared. A client
+    still held by a request is closed once the last holder releases it.
+    """
+    if _client_holds.get(client):
+        _close_pending.add(client)
+        return
+    _schedule_close(client)
+
+
+def _schedule_close(client: GithubClient) -> None:
+    """Run a client's aclose() in the background."""
+    try:
+        task = asyncio.get_running_loop().create_task(client.aclose())
+    except RuntimeError:
+        # Every eviction happens on the event loop; without one there is nothing to close on
+        logger.warning("Evicted GithubClient outside the event loop; its connections were not closed")
+        return
+    _closing_clients.add(task)
+    task.add_done_callback(_closing_clients.discard)
+
+
+@contextlib.contextmanager
+def hold_github_client(client: GithubClient) -> Iterator[GithubClient]:
+    """
+    Keep a per-token GithubClient open while the block uses it, even if it is evicted meanwhile.
+
+    Holds are counted on the event loop thread only, so no lock is needed.
+    """
+    _client_holds[client] = _client_holds.get(client, 0) + 1
+    try:
+        yield client
+    finally:
+        _client_holds[client] -= 1
+        if not _client_holds[client]:
+            del _client_holds[client]
+            if client in _close_pending:
+                _close_pending.discard(client)
+                _schedule_close(client)
+
+
+def discard_github_client(request: Request, access_token: Optional[str]) -> None:
+    """Close and forget the GithubClient for a token whose session has ended."""
+    client = request.app.state.github_clients.pop(access_token) if access_token else None
+    if client is not None:
+        close_github_client(access_token, client)
+
+
+async def close_github_clients(app) -> None:
+    """Close every GithubClient built for the app, waiting for their connections to shut down."""
+    app.state.github_clients.clear()
+    for client in list(_close_pending):
+        _schedule_close(client)
+    _close_pending.clear()
+    await get_anonymous_github_client().aclose()
+    await asyncio.gather(*_closing_clients, return_exceptions=True)
+
+
+@functools.lru_cache(maxsize=None)
+def get_anonymous_github_client() -> GithubClient:
+    """Return the shared GithubClient used for requests without a user OAuth token."""
+    return GithubClient()
+
+
+async def get_github_client(request: Request) -> AsyncIterator[GithubClient]:
+    """
+    Dependency to get a configured GithubClient instance with user's OAuth token if available.
+
+    One client is built per OAuth token and reused across requests. Clients live in
+    app.state.github_clients, which expires them once unused for the session TTL and
+    closes them on eviction; the request holds its client, so it is never closed mid-request.
+    """
     access_token = get_user_token(request)
-    return GithubClient(access_token=access_token)
+    if not access_token:
+        yield get_anonymous_github_client()
+        return
+    with hold_github_client(github_client_for_token(request.app, access_token)) as client:
+        yield client
+
+
+def github_client_for_token(app, access_token: str) -> GithubClient:
+    """Return the app's GithubClient for an OAuth token, building it on first use."""
+    clients = app.state.github_clients
+    client = clients.get(access_token)
+    if client is None:
+        client = GithubClient(access_token=access_token)
+        clients[access_token] = client
+    return client
+
+
+def get_document_retriever(request: Request) -> DocumentRetriever:
+    """Dependency to get the shared DocumentRetriever instance."""
+    return request.app.state.document_retriever
 
 
-def get_document_retriever() -> DocumentRetriever:
-    """Dependency to get a configured DocumentRetriever instance."""
-    return DocumentRetriever()
+def get_repo_parser(request: Request) -> RepoParser:
+    """Dependency to get the shared RepoParser instance."""
+    return request.app.state.repo_parser
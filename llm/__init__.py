@@ -1,7 +1,19 @@
+import asyncio
+import functools
+import hashlib
+import io
 import logging
-from typing import Optional
+import sqlite3
+import zlib
+from typing import Any, Callable, Dict, Optional, Type, TypeVar, Union
 
 import openai
+import orjson
+from pydantic import BaseModel
+
+from util.llm_cache import LLMResponseCache, get_llm_cache
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
 
 
 class BaseLLMClient:
@@ -9,28 +21,108 @@ class BaseLLMClient:
 
     DEFAULT_MODEL = "gpt-4o"
     DEFAULT_TEMPERATURE = 0
-    DEFAULT_STREAM = False
+    # Streamed responses start arriving after the first token instead of after the whole completion
+    DEFAULT_STREAM = True
+    # OpenAI JSON mode: the response is guaranteed to be a single valid JSON object
+    JSON_RESPONSE_FORMAT = {"type": "json_object"}
+    # Rough characters-per-token ratio used for prompt budgeting (no tokenizer dependency)
+    CHARS_PER_TOKEN = 4
+    # Completions in flight across every client and request in the process; beyond this
+    # calls queue locally instead of tripping the API's rate limits
+    MAX_CONCURRENT_COMPLETIONS = 16
+    _completion_semaphore: Optional[asyncio.Semaphore] = None
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def structured_response_format(model_cls: Type[BaseModel]) -> Dict[str, Any]:
+        """
+        Build a strict structured-outputs response_format for a Pydantic model, so the
+        response is guaranteed to match the model's schema.
+
+        Strict mode requires every object to list all of its properties as required and
+        forbid additional ones, which rules out free-form dict fields.
+
+        Args:
+            model_cls: Pydantic model the response must conform to
+
+        Returns:
+            The response_format parameter for the completion call
+        """
+        def make_strict(node: Any) -> None:
+            if isinstance(node, dict):
+                node.pop("default", None)
+                if node.get("type") == "object" and "properties" in node:
+                    node["additionalProperties"] = False
+                    node["required"] = list(node["properties"])
+                for value in node.values():
+                    make_strict(value)
+            elif isinstance(node, list):
+                for value in node:
+                    make_strict(value)
+
+        schema = model_cls.model_json_schema()
+        make_strict(schema)
+        return {
+            "type": "json_schema",
+            "json_schema": {"name": model_cls.__name__, "schema": schema, "strict": True},
+        }
+
+    @classmethod
+    def estimate_tokens(cls, text: str) -> int:
+        """
+        Roughly estimate the token count of text; close enough for budgeting prompts.
+        """
+        return len(text) // cls.CHARS_PER_TOKEN + 1
+
+    @classmethod
+    def clip_to_tokens(cls, text: str, max_tokens: int) -> str:
+        """
+        Truncate text to roughly max_tokens, marking how much was cut.
+
+        Args:
+            text: Text to clip
+            max_tokens: Token budget for the text
+
+        Returns:
+            The text unchanged if it fits, otherwise its head followed by an elision marker
+        """
+        max_chars = max_tokens * cls.CHARS_PER_TOKEN
+        if len(text) <= max_chars:
+            return text
+        return f"{text[:max_chars]}\n[...truncated {cls.estimate_tokens(text[max_chars:])} tokens...]"
+
+    @classmethod
+    def _get_completion_semaphore(cls) -> asyncio.Semaphore:
+        """
+        Return the process-wide completion semaphore, shared by all subclasses.
+        """
+        if BaseLLMClient._completion_semaphore is None:
+            BaseLLMClient._completion_semaphore = asyncio.Semaphore(cls.MAX_CONCURRENT_COMPLETIONS)
+        return BaseLLMClient._completion_semaphore
 
-    def __init__(self, client: openai.OpenAI, model: Optional[str] = None):
+    def __init__(self, client: openai.AsyncOpenAI, model: Optional[str] = None):
         """
         Initialize the base LLM client.
 
         Args:
-            client: OpenAI client instance
+            client: Async OpenAI client instance
             model: Optional model override (defaults to DEFAULT_MODEL)
         """
         self.client = client
         self.model = model or self.DEFAULT_MODEL
         self.logger = logging.getLogger(__name__)
 
-    def make_completion(
+    async def make_completion(
         self,
         prompt: str,
         model: Optional[str] = None,
         temperature: Optional[float] = None,
         stream: Optional[bool] = None,
+        system_prompt: Optional[str] = None,
+        on_token: Optional[Callable[[str], None]] = None,
+        schema: Optional[Type[ModelT]] = None,
         **kwargs
-    ) -> str:
+    ) -> Union[str, Optional[ModelT]]:
         """
         Make a standardized completion call to the LLM.
 
@@ -38,24 +130,122 @@ class BaseLLMClient:
             prompt: The user prompt to send
             model: Optional model override
             temperature: Optional temperature override
-            stream: Optional stream override
+            stream: Optional stream override. Streamed responses are still returned whole.
+            system_prompt: Optional static instructions sent ahead of the prompt. Keeping
+                           shared text here lets OpenAI's prompt cache reuse it across calls;
+                           calls sharing a system prompt also share a prompt_cache_key, so
+                           they are routed to the same cache.
+            on_token: Optional callback invoked with each streamed content delta, e.g. for progress
+            schema: Optional Pydantic model the response must conform to. It is enforced
+                    server-side with strict structured outputs, so the model can't contain
+                    free-form dict fields (see structured_response_format).
             **kwargs: Additional parameters to pass to the completion call
 
         Returns:
-            The completion response content
+            The completion response content, or an instance of schema if one was given
+            (None if the model returned no content, e.g. a refusal)
 
         Raises:
             Exception: If the completion call fails
         """
+        model = model or self.model
+        # Explicit None checks: a caller's temperature=0.0 must not fall through to the default
+        temperature = temperature if temperature is not None else self.DEFAULT_TEMPERATURE
+        stream = stream if stream is not None else self.DEFAULT_STREAM
+        if schema is not None:
+            kwargs["response_format"] = self.structured_response_format(schema)
+
+        # Only deterministic completions are safe to replay from the cache
+        cache = get_llm_cache() if temperature == 0 else None
+        cache_key = cache.make_key(model, f"{system_prompt or ''}\0{prompt}", kwargs) if cache else None
+        if cache:
+            cached = await self._cache_get(cache, cache_key)
+            if cached is not None:
+                self.logger.debug("LLM cache hit for %s", cache_key[:12])
+                return self._parse_structured(cached, schema) if schema is not None else cached
+
+        messages = [{"role": "user", "content": prompt}]
+        if system_prompt:
+            messages.insert(0, {"role": "system", "content": system_prompt})
+
+        if system_prompt:
+            # Sent through extra_body, since the pinned SDK predates a prompt_cache_key argument
+            prompt_cache_key = hashlib.sha256(system_prompt.encode()).hexdigest()[:32]
+            kwargs["extra_body"] = {"prompt_cache_key": prompt_cache_key, **(kwargs.get("extra_body") or {})}
+        if stream:
+            # The final chunk then carries token usage, including prompt-cache hits
+            kwargs.setdefault("stream_options", {"include_usage": True})
+
         try:
-            response = self.client.chat.completions.create(
-                model=model or self.model,
-                temperature=temperature or self.DEFAULT_TEMPERATURE,
-                stream=stream or self.DEFAULT_STREAM,
-                messages=[{"role": "user", "content": prompt}],
-                **kwargs
-            )
-            return response.choices[0].message.content
+            async with self._get_completion_semaphore():
+                response = await self.client.chat.completions.create(
+                    model=model,
+                    temperature=temperature,
+                    stream=stream,
+                    messages=messages,
+                    **kwargs
+                )
+                if stream:
+                    buffer = io.StringIO()
+                    usage = None
+                    async for chunk in response:
+                        usage = chunk.usage or usage
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if delta:
+                            buffer.write(delta)
+                            if on_token:
+                                on_token(delta)
+                    content = buffer.getvalue()
+                else:
+                    usage = response.usage
+                    content = response.choices[0].message.content
         except Exception as e:
-            self.logger.error(f"Error making completion call: {str(e)}")
+            self.logger.error("Error making completion call: %s", e)
             raise
+
+        if usage and self.logger.isEnabledFor(logging.DEBUG):
+            details = getattr(usage, "prompt_tokens_details", None)
+            self.logger.debug(
+                "LLM usage: %s prompt tokens (%s cached), %s completion tokens",
+                usage.prompt_tokens, getattr(details, "cached_tokens", 0) or 0, usage.completion_tokens,
+            )
+
+        if cache and content:
+            await self._cache_set(cache, cache_key, content)
+        return self._parse_structured(content, schema) if schema is not None else content
+
+    async def _cache_get(self, cache: LLMResponseCache, key: str) -> Optional[str]:
+        """
+        Read from the response cache off the event loop. Any cache failure (a database locked
+        by another worker, a corrupt row) is logged and treated as a miss.
+        """
+        try:
+            return await asyncio.to_thread(cache.get, key)
+        except (sqlite3.Error, zlib.error, UnicodeDecodeError) as e:
+            self.logger.warning("LLM cache read failed, treating as a miss: %s", e)
+            return None
+
+    async def _cache_set(self, cache: LLMResponseCache, key: str, value: str) -> None:
+        """
+        Write to the response cache off the event loop. Failures (e.g. a locked database or a
+        full disk) are logged and otherwise ignored; the response has already been produced.
+        """
+        try:
+            await asyncio.to_thread(cache.set, key, value)
+        except (sqlite3.Error, zlib.error) as e:
+            self.logger.warning("LLM cache write failed, skipping: %s", e)
+
+    @staticmethod
+    def _parse_structured(content: Optional[str], schema: Type[ModelT]) -> Optional[ModelT]:
+        """
+        Build a schema instance from a structured-outputs response.
+
+        Strict structured outputs guarantee the response matches the schema, so the model is
+        built without re-validating it; full validation is only the fallback for a surprise.
+        """
+        if not content:
+            return None
+        result_dict = orjson.loads(content)
+        if isinstance(result_dict, dict) and result_dict.keys() == schema.model_fields.keys():
+            return schema.model_construct(**result_dict)
+        return schema.model_validate(result_dict)
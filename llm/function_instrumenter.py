@@ -1,12 +1,18 @@
-import json
-from typing import Dict, Literal, List
+import asyncio
+import hashlib
+import logging
+import mmap
+import os
+from collections import OrderedDict
+from typing import Dict, Literal, List, Optional, Tuple
 
 import openai
-from pydantic import BaseModel, Field
+import orjson
+from pydantic import BaseModel, Field, ValidationError
 
-from util.document import Document
 from util.document_retriever import DocSection
-from util.prompt_loader import load_prompt_template, parse_json_response
+from util.llm_cache import get_llm_cache
+from util.prompt_loader import load_prompt_template
 from llm import BaseLLMClient
 
 
@@ -23,16 +29,28 @@ class InstrumentationResult(BaseModel):
 class FunctionInstrumenter(BaseLLMClient):
     """Class responsible for instrumenting AWS Lambda functions with Datadog."""
 
-    def __init__(self, client: openai.OpenAI):
+    # Any of these in a file means Datadog is already set up there
+    ALREADY_INSTRUMENTED_MARKERS = ("Datadog-Extension", "datadog-cdk-constructs", "dd-trace-py", "DD_SERVICE")
+    # Per-call input caps. Files are never truncated (the model must echo them back whole),
+    # so a file over MAX_FILE_TOKENS is rejected instead.
+    MAX_FILE_TOKENS = 12000
+    MAX_DOCUMENTATION_TOKENS = 8000
+    MAX_ADDITIONAL_CONTEXT_TOKENS = 1000
+    # Recently instrumented file contents kept in memory, for duplicate files (monorepos, symlinks)
+    RESULT_CACHE_SIZE = 256
+
+    def __init__(self, client: openai.AsyncOpenAI):
         """
         Initialize the FunctionInstrumenter.
 
         Args:
-            client: OpenAI client instance for code analysis and modification
+            client: Async OpenAI client instance for code analysis and modification
         """
         super().__init__(client)
+        # Content hash -> (instrumented content, next steps); see _result_cache_key
+        self._result_cache: "OrderedDict[str, Tuple[str, List[str]]]" = OrderedDict()
 
-    def instrument_file(self, file_path: str, file_type: str, dd_documentation: DocSection, runtime: str, additional_context: str = "") -> InstrumentationResult:
+    async def instrument_file(self, file_path: str, file_type: str, dd_documentation: DocSection, runtime: str, additional_context: str = "", system_prompt: Optional[str] = None) -> InstrumentationResult:
         """
         Instrument a file with Datadog Lambda instrumentation.
 
@@ -42,53 +60,189 @@ class FunctionInstrumenter(BaseLLMClient):
             dd_documentation: Datadog documentation
             runtime: Programming language runtime
             additional_context: Optional additional context from the user
+            system_prompt: Optional prebuilt system prompt from _build_system_prompt, so
+                           callers instrumenting many files render it only once
 
         Returns:
             InstrumentationResult containing the modified code and change information
         """
-        # Read file content
-        with open(file_path, 'r', encoding='utf-8') as f:
-            file_content = f.read()
+        # Read file content off the event loop
+        file_content = await asyncio.to_thread(self._read_file, file_path)
+
+        # Re-runs over an already instrumented file would only echo it back; skip the LLM call
+        if any(marker in file_content for marker in self.ALREADY_INSTRUMENTED_MARKERS):
+            self.logger.info("%s file %s already contains Datadog instrumentation, skipping", file_type, file_path)
+            return InstrumentationResult(
+                file_changes={},
+                next_steps=[f"`{file_path}` is already instrumented with Datadog; no changes were made."],
+            )
+
+        if self.estimate_tokens(file_content) > self.MAX_FILE_TOKENS:
+            raise ValueError(f"{file_path} is too large to instrument (over {self.MAX_FILE_TOKENS} tokens)")
 
         prompt = load_prompt_template(
             "instrument",
-            file_type=file_type,
-            documentation=dd_documentation,
             file_path=file_path,
             file_content=file_content,
             runtime=runtime,
-            additional_context=additional_context,
+            additional_context=self.clip_to_tokens(additional_context, self.MAX_ADDITIONAL_CONTEXT_TOKENS),
+        )
+        if system_prompt is None:
+            system_prompt = self._build_system_prompt(file_type, dd_documentation)
+
+        # An identical file seen under another path gets the same changes without another LLM call
+        cache_key = self._result_cache_key(system_prompt, runtime, additional_context, file_content)
+        cached = await self._get_cached_result(cache_key)
+        if cached is not None:
+            self.logger.info("%s file %s matches a previously instrumented file, reusing its changes", file_type, file_path)
+            changed_content, next_steps = cached
+            return InstrumentationResult(
+                file_changes={file_path: changed_content},
+                next_steps=list(next_steps),
+                docs_urls=[dd_documentation.url] if dd_documentation and hasattr(dd_documentation, 'url') else [],
+            )
+
+        result = await self._run_instrumentation(prompt, system_prompt, file_type, file_path, dd_documentation)
+
+        # Only a result keyed by the requested path can be replayed for another path
+        if result.file_changes.keys() == {file_path}:
+            await self._store_result(cache_key, result.file_changes[file_path], list(result.next_steps))
+        return result
+
+    async def _get_cached_result(self, cache_key: str) -> Optional[Tuple[str, List[str]]]:
+        """
+        Look up a previous result for identical file content, in memory first and then in the
+        on-disk LLM cache (which survives restarts and is shared by worker processes).
+        """
+        cached = self._result_cache.get(cache_key)
+        if cached is not None:
+            self._result_cache.move_to_end(cache_key)
+            return cached
+
+        disk_cache = get_llm_cache()
+        stored = await self._cache_get(disk_cache, disk_cache.make_key(self.model, f"instrument_result\0{cache_key}", {})) if disk_cache else None
+        if stored is None:
+            return None
+        try:
+            entry = orjson.loads(stored)
+            cached = (entry["content"], entry["next_steps"])
+        except (ValueError, KeyError, TypeError) as e:
+            self.logger.warning("Ignoring unreadable cached instrumentation result: %s", e)
+            return None
+        self._remember_result(cache_key, cached)
+        return cached
+
+    async def _store_result(self, cache_key: str, content: str, next_steps: List[str]) -> None:
+        """
+        Record a result for reuse by later files with identical content.
+        """
+        self._remember_result(cache_key, (content, next_steps))
+        disk_cache = get_llm_cache()
+        if disk_cache:
+            await self._cache_set(
+                disk_cache,
+                disk_cache.make_key(self.model, f"instrument_result\0{cache_key}", {}),
+                orjson.dumps({"content": content, "next_steps": next_steps}).decode(),
+            )
+
+    def _remember_result(self, cache_key: str, entry: Tuple[str, List[str]]) -> None:
+        """
+        Add an entry to the in-memory result cache, evicting the least recently used one.
+        """
+        self._result_cache[cache_key] = entry
+        self._result_cache.move_to_end(cache_key)
+        if len(self._result_cache) > self.RESULT_CACHE_SIZE:
+            self._result_cache.popitem(last=False)
+
+    @staticmethod
+    def _result_cache_key(system_prompt: str, runtime: str, additional_context: str, file_content: str) -> str:
+        """
+        Hash everything besides the file path that shapes an instrumentation result.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (system_prompt, runtime, additional_context, file_content):
+            digest.update(part.encode())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _build_system_prompt(self, file_type: str, dd_documentation: DocSection) -> str:
+        """
+        Render the static instrumentation instructions and documentation.
+
+        The result is identical for every file in a run, so it forms a cacheable prefix;
+        only the per-file details go in the user prompt.
+        """
+        # Render the docs as normalized text rather than the DocSection repr, so identical
+        # documentation always yields a byte-identical prefix
+        documentation = dd_documentation.to_prompt() if hasattr(dd_documentation, 'to_prompt') else ""
+        documentation = self.clip_to_tokens(documentation, self.MAX_DOCUMENTATION_TOKENS)
+        return load_prompt_template(
+            "instrument_system",
+            file_type=file_type,
+            documentation=documentation,
         )
 
+    async def _run_instrumentation(self, prompt: str, system_prompt: str, file_type: str, label: str, dd_documentation: DocSection) -> InstrumentationResult:
+        """
+        Send an instrumentation prompt to the LLM and parse the result.
+
+        Args:
+            prompt: Per-file user prompt
+            system_prompt: Rendered static instructions from _build_system_prompt
+            file_type: Type of file (e.g., "CDK", "Terraform")
+            label: Description of the file being instrumented, for logging
+            dd_documentation: Datadog documentation
+
+        Returns:
+            InstrumentationResult containing the modified code and change information
+        """
         try:
-            result_text = self.make_completion(prompt)
+            result_text = await self.make_completion(
+                prompt, system_prompt=system_prompt, response_format=self.JSON_RESPONSE_FORMAT
+            )
 
-            self.logger.info(f"🔍 OpenAI response length: {len(result_text) if result_text else 0}")
-            self.logger.info(f"🔍 OpenAI response preview: {result_text[:200] if result_text else 'None'}...")
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("🔍 OpenAI response length: %s", len(result_text) if result_text else 0)
+                self.logger.debug("🔍 OpenAI response preview: %s...", result_text[:200] if result_text else 'None')
 
             if not result_text or not result_text.strip():
                 raise ValueError("OpenAI returned empty response")
 
-            result_dict = parse_json_response(result_text)
+            # JSON mode guarantees a bare JSON object, so parse and validate it in one pass
+            # with the model's compiled validator instead of json.loads + InstrumentationResult(**dict)
+            result = InstrumentationResult.model_validate_json(result_text)
 
             # Add the documentation URL to the result
             if dd_documentation and hasattr(dd_documentation, 'url'):
-                result_dict['docs_urls'] = [dd_documentation.url]
-
-            self.logger.info(f"Successfully instrumented {file_type} file with Datadog: {file_path}")
-            return InstrumentationResult(**result_dict)
-        except json.JSONDecodeError as e:
-            self.logger.error(f"JSON parsing error for {file_type} file {file_path}: {str(e)}")
-            self.logger.error(f"Raw OpenAI response: {result_text if 'result_text' in locals() else 'No response'}")
-            raise ValueError(f"Failed to parse OpenAI response as JSON: {str(e)}")
+                result.docs_urls = [dd_documentation.url]
+
+            self.logger.info("Successfully instrumented %s file with Datadog: %s", file_type, label)
+            return result
+        except ValidationError as e:
+            self.logger.error("Invalid JSON response for %s file %s: %s", file_type, label, e)
+            self.logger.error("Raw OpenAI response: %s", result_text if 'result_text' in locals() else 'No response')
+            raise ValueError(f"Failed to parse OpenAI response as InstrumentationResult: {str(e)}")
         except Exception as e:
-            self.logger.error(f"Error instrumenting {file_type} file {file_path}: {str(e)}")
+            self.logger.error("Error instrumenting %s file %s: %s", file_type, label, e)
             raise
 
-    def instrument_cdk_file(self, file_path: str, dd_documentation: DocSection, runtime: str, additional_context: str = "") -> InstrumentationResult:
+    @staticmethod
+    def _read_file(file_path: str) -> str:
+        """
+        Read a UTF-8 file by decoding its memory-mapped pages directly, avoiding the
+        intermediate bytes copy of a buffered read.
+        """
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                # mmap cannot map an empty file
+                return ""
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return str(mm, 'utf-8')
+
+    async def instrument_cdk_file(self, file_path: str, dd_documentation: DocSection, runtime: str, additional_context: str = "") -> InstrumentationResult:
         """Instrument a CDK file with Datadog Lambda instrumentation."""
-        return self.instrument_file(file_path, "CDK stack", dd_documentation, runtime, additional_context)
+        return await self.instrument_file(file_path, "CDK stack", dd_documentation, runtime, additional_context)
 
-    def instrument_terraform_file(self, file_path: str, dd_documentation: DocSection, runtime: str, additional_context: str = "") -> InstrumentationResult:
+    async def instrument_terraform_file(self, file_path: str, dd_documentation: DocSection, runtime: str, additional_context: str = "") -> InstrumentationResult:
         """Instrument a Terraform file with Datadog Lambda instrumentation."""
-        return self.instrument_file(file_path, "Terraform", dd_documentation, runtime, additional_context)
+        return await self.instrument_file(file_path, "Terraform", dd_documentation, runtime, additional_context)
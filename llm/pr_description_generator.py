@@ -1,11 +1,10 @@
-import json
-import logging
-from typing import Dict, List
+from typing import List
 
 import openai
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError
 
-from util.prompt_loader import load_prompt_template, parse_json_response
+from util.diff_compactor import compact_diff
+from util.prompt_loader import load_prompt_template
 from llm import BaseLLMClient
 
 
@@ -19,20 +18,25 @@ class PRDescription(BaseModel):
 
 class PRDescriptionGenerator(BaseLLMClient):
     """
-    Class responsible for generating PR descriptions using LangChain and OpenAI.
+    Class responsible for generating PR descriptions using OpenAI.
     Analyzes file changes and creates professional pull request descriptions.
     """
 
-    def __init__(self, client: openai.OpenAI):
+    # Diff size budget for the prompt, in estimated tokens
+    MAX_DIFF_TOKENS = 12000
+    MAX_LINES_PER_HUNK = 40
+    MIN_LINES_PER_HUNK = 4
+
+    def __init__(self, client: openai.AsyncOpenAI):
         """
         Initialize the PRDescriptionGenerator.
 
         Args:
-            client: OpenAI client instance for PR description generation
+            client: Async OpenAI client instance for PR description generation
         """
         super().__init__(client)
 
-    def generate_description_from_diff(self, git_diff: str, file_names: List[str]) -> PRDescription:
+    async def generate_description_from_diff(self, git_diff: str, file_names: List[str]) -> PRDescription:
         """
         Generate a PR description based on git diff output.
 
@@ -43,28 +47,44 @@ class PRDescriptionGenerator(BaseLLMClient):
         Returns:
             PRDescription containing title, description, and summary
         """
+        # A summary doesn't need every changed line; shrink hunks until the diff fits the budget
+        max_lines_per_hunk = self.MAX_LINES_PER_HUNK
+        compacted = compact_diff(git_diff, max_lines_per_hunk)
+        while self.estimate_tokens(compacted) > self.MAX_DIFF_TOKENS and max_lines_per_hunk > self.MIN_LINES_PER_HUNK:
+            max_lines_per_hunk //= 2
+            compacted = compact_diff(git_diff, max_lines_per_hunk)
+        compacted = self.clip_to_tokens(compacted, self.MAX_DIFF_TOKENS)
+
         prompt = load_prompt_template(
             "generate_pr_description",
             file_names=', '.join(file_names),
-            git_diff=git_diff
+            git_diff=compacted
         )
 
         try:
-            result_text = self.make_completion(prompt)
-            result_dict = parse_json_response(result_text)
-
-            self.logger.debug("Successfully generated PR description from git diff")
-
-            return PRDescription(**result_dict)
-        except Exception as e:
-            self.logger.error(f"Error generating PR description from diff: {str(e)}")
-            # Fallback to a basic description
-            return PRDescription(
-                title="Instrument with Datadog",
-                description="This PR adds Datadog monitoring and tracing instrumentation to AWS Lambda functions in the infrastructure code.",
-                summary=[
-                    "Added Datadog Lambda Extension layer",
-                    "Added Datadog Tracing layer",
-                    "Configured DD_ENV, DD_SERVICE, and DD_VERSION environment variables",
-                ],
-            )
+            result = await self.make_completion(prompt, schema=PRDescription)
+        except (openai.APIError, ValueError, ValidationError) as e:
+            # API failures and truncated or schema-invalid responses (JSON decode and validation
+            # errors) fall back; the PR can still go out with a generic description
+            self.logger.error("Error generating PR description from diff: %s", e)
+            return self._fallback_description()
+
+        if result is None:
+            # A refusal streams no content, so there is nothing to parse
+            self.logger.warning("PR description generation returned no content, using the default description")
+            return self._fallback_description()
+
+        self.logger.debug("Successfully generated PR description from git diff")
+        return result
+
+    def _fallback_description(self) -> PRDescription:
+        """Basic description used when the LLM call fails."""
+        return PRDescription(
+            title="Instrument with Datadog",
+            description="This PR adds Datadog monitoring and tracing instrumentation to AWS Lambda functions in the infrastructure code.",
+            summary=[
+                "Added Datadog Lambda Extension layer",
+                "Added Datadog Tracing layer",
+                "Configured DD_ENV, DD_SERVICE, and DD_VERSION environment variables",
+            ],
+        )
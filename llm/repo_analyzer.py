@@ -1,16 +1,22 @@
+import hashlib
 import os
-from typing import List, Literal, Dict, Any
+import re
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Iterator, List, Literal, Optional, Tuple
 
 import openai
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 from util.document import Document
-from util.prompt_loader import load_prompt_template, parse_json_response
+from util.prompt_loader import load_prompt_template
 from llm import BaseLLMClient
 
 
 class RepoType(BaseModel):
     """Schema for repository type analysis output."""
+    # Stray whitespace around a path or runtime would break the lookups done with them
+    model_config = ConfigDict(extra='ignore', str_strip_whitespace=True)
+
     repo_type: Literal["cdk", "terraform", "neither"] = Field(description="The type of infrastructure as code project")
     confidence: float = Field(description="Confidence score between 0 and 1")
     evidence: List[str] = Field(description="List of evidence found in the repository that led to this conclusion")
@@ -20,6 +26,8 @@ class RepoType(BaseModel):
 
 class RelevantFiles(BaseModel):
     """Schema for relevant files analysis output."""
+    model_config = ConfigDict(extra='ignore', str_strip_whitespace=True)
+
     files_to_modify: List[str] = Field(description="List of file paths that need to be modified")
     files_to_create: List[str] = Field(description="List of new file paths that need to be created")
     reasoning: List[str] = Field(description="List of reasoning for why each file was selected")
@@ -27,56 +35,242 @@ class RelevantFiles(BaseModel):
 class RepoAnalyzer(BaseLLMClient):
     """
     Analyzes repository contents to determine if it's a CDK, Terraform, or neither.
-    Uses LangChain and OpenAI to perform the analysis.
+    Uses OpenAI to perform the analysis.
     """
 
-    def __init__(self, client: openai.OpenAI):
+    # Classification is tried on the cheap model first; the default model only sees repositories
+    # it is unsure about (or calls neither)
+    TRIAGE_MODEL = "gpt-4o-mini"
+    ESCALATION_CONFIDENCE = 0.8
+    # Strict structured outputs: decoding is constrained to the RepoType schema
+    REPO_TYPE_FORMAT = BaseLLMClient.structured_response_format(RepoType)
+    # Rules for the zero-token classification path, mirroring the analyze_repo prompt
+    CDK_STACK_PATTERN = re.compile(r"extends\s+(?:cdk\.)?Stack\b|class\s+\w+\((?:cdk\.|core\.)?Stack\)|class\s+\w+\s*:\s*Stack\b")
+    CDK_RUNTIMES_BY_EXTENSION = {".ts": "node.js", ".js": "node.js", ".py": "python", ".java": "java", ".cs": "dotnet"}
+    TERRAFORM_RUNTIME_PATTERN = re.compile(r'runtime\s*=\s*"([a-z]+)')
+    TERRAFORM_RUNTIMES_BY_PREFIX = {"nodejs": "node.js", "python": "python", "java": "java", "go": "go", "provided": None, "ruby": "ruby", "dotnet": "dotnet"}
+    # Budget for the repository listing in the prompt. Past it, IaC-relevant paths are kept first.
+    MAX_REPO_CONTENTS_TOKENS = 4000
+    IAC_FILENAMES = frozenset({"cdk.json", "cdk.context.json", "package.json", "requirements.txt", "serverless.yml", "serverless.yaml"})
+    IAC_SUFFIXES = (".tf", ".tfvars", ".tfstate")
+    # Recent LLM analyses kept in memory, so re-analyzing an unchanged repository is a dict lookup
+    ANALYSIS_CACHE_SIZE = 128
+
+    def __init__(self, client: openai.AsyncOpenAI):
         """
         Initialize the RepoAnalyzer.
 
         Args:
-            client: OpenAI client instance for repository analysis
+            client: Async OpenAI client instance for repository analysis
         """
         super().__init__(client)
+        # Prompt digest -> analysis; see analyze_repo
+        self._analysis_cache: "OrderedDict[str, RepoType]" = OrderedDict()
+        # How analyses were resolved (local, triage, escalated), for tuning ESCALATION_CONFIDENCE
+        self.resolution_counts: Counter = Counter()
 
-    def analyze_repo(self, tree: Dict[str, Any]) -> RepoType:
+    async def analyze_repo(self, tree: Dict[str, Any]) -> RepoType:
         """
         Analyze repository contents to determine its type.
         :param tree: Dict representing the repository tree structure
         :return: RepoType object containing the analysis results
         """
+        # Most repositories are unambiguous from their file layout; only ask the LLM when they aren't
+        local_result = self._classify_locally(tree)
+        if local_result:
+            self.logger.info("Classified repository locally as %s: %s", local_result.repo_type, local_result.script_file)
+            self.resolution_counts["local"] += 1
+            return local_result
+
         # Format repository contents as a tree structure for the prompt
-        repo_contents = self._format_tree_structure(tree)
+        repo_contents = self._listing_for_prompt(tree)
 
+        # Static instructions go in the system message, so repeated calls share a cacheable prefix
+        system_prompt = load_prompt_template("analyze_repo_system")
         prompt = load_prompt_template(
             "analyze_repo",
             repo_contents=repo_contents
         )
 
+        # The rendered prompts cover both the tree and the templates, so a template edit is a miss
+        cache_key = hashlib.blake2b(f"{self.model}\0{system_prompt}\0{prompt}".encode(), digest_size=16).hexdigest()
+        cached = self._analysis_cache.get(cache_key)
+        if cached is not None:
+            self._analysis_cache.move_to_end(cache_key)
+            self.logger.debug("Reusing analysis of an unchanged repository tree")
+            return cached.model_copy(deep=True)
+
         try:
-            result_text = self.make_completion(prompt)
-            result_dict = parse_json_response(result_text)
-            return RepoType(**result_dict)
+            result = await self._complete_analysis(prompt, system_prompt, self.TRIAGE_MODEL)
+            if result.confidence < self.ESCALATION_CONFIDENCE or result.repo_type == "neither":
+                self.logger.info(
+                    "Escalating repository analysis to %s (%s at confidence %s)", self.model, result.repo_type, result.confidence
+                )
+                result = await self._complete_analysis(prompt, system_prompt, self.model)
+                self.resolution_counts["escalated"] += 1
+            else:
+                self.resolution_counts["triage"] += 1
         except Exception as e:
-            self.logger.error(f"Error analyzing repository: {str(e)}")
+            self.logger.error("Error analyzing repository: %s", e)
             raise
+        self.logger.debug("Repository analysis resolutions so far: %s", dict(self.resolution_counts))
 
-    def _format_tree_structure(self, tree: Dict[str, Any], prefix: str = "") -> str:
+        self._analysis_cache[cache_key] = result.model_copy(deep=True)
+        if len(self._analysis_cache) > self.ANALYSIS_CACHE_SIZE:
+            self._analysis_cache.popitem(last=False)
+        return result
+
+    async def _complete_analysis(self, prompt: str, system_prompt: str, model: str) -> RepoType:
         """
-        Format the tree structure similar to ls -d -- */* output.
+        Run the analyze_repo completion on one model and parse its RepoType.
+        """
+        result_text = await self.make_completion(prompt, model=model, system_prompt=system_prompt, response_format=self.REPO_TYPE_FORMAT)
+        # The schema is enforced server-side; validation is a cheap sanity check that also
+        # applies the model's whitespace stripping
+        return RepoType.model_validate_json(result_text)
+
+    def _listing_for_prompt(self, tree: Dict[str, Any]) -> str:
+        """
+        Format a repository tree for the analysis prompt, pruned to MAX_REPO_CONTENTS_TOKENS.
+        """
+        repo_contents = self._format_tree_structure(tree)
+        if self.estimate_tokens(repo_contents) > self.MAX_REPO_CONTENTS_TOKENS:
+            repo_contents = self._prune_listing(repo_contents)
+        return repo_contents
+
+    def _prune_listing(self, repo_contents: str) -> str:
+        """
+        Shrink a repository listing to MAX_REPO_CONTENTS_TOKENS.
+
+        Paths that drive the classification (CDK/Terraform config, dependency manifests and
+        stack files) are kept first; the remaining budget is filled with other paths in
+        listing order, and a final line tells the model how many were left out.
+
+        Args:
+            repo_contents: Listing from _format_tree_structure
+
+        Returns:
+            The pruned listing, in its original order
+        """
+        lines = repo_contents.split("\n")
+        budget = self.MAX_REPO_CONTENTS_TOKENS * self.CHARS_PER_TOKEN
+        keep = [self._is_iac_path(line) for line in lines]
+        used = sum(len(line) + 1 for line, kept in zip(lines, keep) if kept)
+        for index, line in enumerate(lines):
+            if not keep[index] and used + len(line) + 1 <= budget:
+                keep[index] = True
+                used += len(line) + 1
+
+        pruned = [line for line, kept in zip(lines, keep) if kept]
+        # Classification paths alone may exceed the budget; drop whole trailing paths until it fits
+        while len(pruned) > 1 and used > budget:
+            used -= len(pruned.pop()) + 1
+
+        # Count omissions after trimming, so the marker matches what the model actually sees
+        omitted = len(lines) - len(pruned)
+        return "\n".join(pruned) + f"\n[... {omitted} more paths omitted ...]"
+
+    def _is_iac_path(self, path: str) -> bool:
+        """
+        Whether a listed path is one the classification depends on.
+        """
+        basename = path.rstrip("/").rsplit("/", 1)[-1]
+        return (
+            basename in self.IAC_FILENAMES
+            or basename.endswith(self.IAC_SUFFIXES)
+            or "stack" in basename.lower()
+        )
+
+    def _classify_locally(self, tree: Dict[str, Any]) -> Optional[RepoType]:
+        """
+        Classify a repository with filename/content rules, without calling the LLM.
+
+        Only clear-cut layouts are decided here: cdk.json without .tf files and a single
+        Stack definition, or .tf files without cdk.json and a single file defining
+        aws_lambda_function (or a single such main.tf, which the prompt also prefers)
+        with a recognizable runtime.
+
+        Args:
+            tree: Dict representing the repository tree structure
+
+        Returns:
+            RepoType if the repository is unambiguous, otherwise None
         """
-        result = []
+        files = dict(self._iter_files(tree))
+        basenames = {path.rsplit("/", 1)[-1] for path in files}
+        has_cdk_config = "cdk.json" in basenames
+        tf_files = [path for path in files if path.endswith(".tf")]
 
+        if has_cdk_config and not tf_files:
+            stack_files = [
+                path for path in files
+                if os.path.splitext(path)[1] in self.CDK_RUNTIMES_BY_EXTENSION
+                and self.CDK_STACK_PATTERN.search(files[path].page_content)
+            ]
+            if len(stack_files) != 1:
+                return None
+            script_file = stack_files[0]
+            return RepoType(
+                repo_type="cdk",
+                confidence=1.0,
+                evidence=["Found cdk.json configuration", f"Found Stack class in {script_file}"],
+                script_file=script_file,
+                runtime=self.CDK_RUNTIMES_BY_EXTENSION[os.path.splitext(script_file)[1]],
+            )
+
+        if tf_files and not has_cdk_config:
+            lambda_files = [path for path in tf_files if "aws_lambda_function" in files[path].page_content]
+            if len(lambda_files) > 1:
+                # Same tie-break as the analyze_repo prompt: prefer main.tf when it defines the function
+                lambda_files = [path for path in lambda_files if path.rsplit("/", 1)[-1] == "main.tf"]
+            if len(lambda_files) != 1:
+                return None
+            script_file = lambda_files[0]
+            runtime_match = self.TERRAFORM_RUNTIME_PATTERN.search(files[script_file].page_content)
+            runtime = self.TERRAFORM_RUNTIMES_BY_PREFIX.get(runtime_match.group(1)) if runtime_match else None
+            if not runtime:
+                return None
+            return RepoType(
+                repo_type="terraform",
+                confidence=1.0,
+                evidence=[f"Found {len(tf_files)} .tf files and no cdk.json", f"Found aws_lambda_function resource in {script_file}"],
+                script_file=script_file,
+                runtime=runtime,
+            )
+
+        return None
+
+    def _iter_files(self, tree: Dict[str, Any], prefix: str = "") -> Iterator[Tuple[str, Document]]:
+        """
+        Yield (path relative to the repository root, Document) for every file in the tree.
+        """
         for name, node in tree.items():
             if isinstance(node, Document):
-                # File
-                result.append(f"{prefix}{name}")
+                yield f"{prefix}{name}", node
             elif isinstance(node, dict):
-                # Directory
-                result.append(f"{prefix}{name}/")
-                # Recursively add contents with updated prefix
-                nested_result = self._format_tree_structure(node, f"{prefix}{name}/")
-                if nested_result:
-                    result.append(nested_result)
-
-        return "\n".join(result)
+                yield from self._iter_files(node, f"{prefix}{name}/")
+
+    def _format_tree_structure(self, tree: Dict[str, Any], prefix: str = "") -> str:
+        """
+        Format the tree structure similar to ls -d -- */* output.
+
+        Walks the tree iteratively with a stack of per-directory iterators, which keeps the
+        depth-first listing order without a Python call per directory, and joins once at the end.
+        """
+        lines: List[str] = []
+        stack = [(iter(tree.items()), prefix)]
+        while stack:
+            entries, dir_prefix = stack[-1]
+            for name, node in entries:
+                if isinstance(node, Document):
+                    # File
+                    lines.append(dir_prefix + name)
+                elif isinstance(node, dict):
+                    # Directory: list it, then descend before continuing with its siblings
+                    child_prefix = f"{dir_prefix}{name}/"
+                    lines.append(child_prefix)
+                    stack.append((iter(node.items()), child_prefix))
+                    break
+            else:
+                stack.pop()
+        return "\n".join(lines)
@@ -1,16 +1,38 @@
+import dotenv
+
+# Load .env before anything else is imported: config, the LLM cache and the prompt loader
+# read their settings from the environment at import time
+dotenv.load_dotenv()
+
+import asyncio
 import os
 import secrets
-from typing import Optional
 from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.responses import JSONResponse, FileResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
+from starlette.background import BackgroundTask
 from datetime import datetime, timezone
-import requests
+import httpx
 from ddtrace import llmobs
-import dotenv
+from github.GithubException import GithubException
 
 from config import setup_logging, setup_openai_client
+from dependencies import (close_github_client, close_github_clients, discard_github_client,
+                          get_anonymous_github_client, get_user_token, github_client_for_token,
+                          hold_github_client)
+from llm.function_instrumenter import FunctionInstrumenter
+from llm.pr_description_generator import PRDescriptionGenerator
+from llm.repo_analyzer import RepoAnalyzer
 from routers import health, instrument
+from util.document_retriever import DocumentRetriever
+from util.prompt_loader import preload_prompt_templates
+from util.repo_parser import RepoParser
+from util.session_store import TTLStore
+
+
+# Seconds an OAuth login may take, and seconds a session (cookie and stored token) lasts
+OAUTH_STATE_TTL = 600
+SESSION_TTL = 3600
 
 
 def create_app():
@@ -18,8 +40,6 @@ def create_app():
     logger = setup_logging()
     client = setup_openai_client()
 
-    dotenv.load_dotenv()
-
     llmobs.LLMObs.enable(ml_app="dd-instrumenter-agent", agentless_enabled=True)
 
     app = FastAPI(
@@ -34,30 +54,70 @@ def create_app():
     app.state.openai_client = client
     app.state.logger = logger
 
+    # Templates are static for the process lifetime; load them before serving traffic
+    preload_prompt_templates()
+
+    # Request-independent collaborators are built once and shared by the dependency providers
+    app.state.repo_analyzer = RepoAnalyzer(client)
+    app.state.function_instrumenter = FunctionInstrumenter(client)
+    app.state.pr_description_generator = PRDescriptionGenerator(client)
+    app.state.document_retriever = DocumentRetriever()
+    app.state.repo_parser = RepoParser()
+
     # GitHub OAuth configuration
     GITHUB_CLIENT_ID = os.getenv("GITHUB_CLIENT_ID")
     GITHUB_CLIENT_SECRET = os.getenv("GITHUB_CLIENT_SECRET")
     GITHUB_OAUTH_REDIRECT_URI = os.getenv("GITHUB_OAUTH_REDIRECT_URI", "http://127.0.0.1:8000/auth/github/callback")
 
-    # In-memory session store (in production, use Redis or database)
-    oauth_sessions = {}
-    user_tokens = {}
+    # Pooled async HTTP client for GitHub OAuth calls: TLS connections are reused and the
+    # token exchange no longer blocks the event loop
+    github_http = httpx.AsyncClient(
+        headers={"Accept": "application/json"},
+        timeout=5.0,
+        limits=httpx.Limits(max_connections=10, max_keepalive_connections=10),
+    )
+    app.state.github_http = github_http
+
+    @app.on_event("startup")
+    async def warm_connections():
+        """Open the OpenAI and GitHub API connections (DNS, TLS) before the first request needs them."""
+        results = await asyncio.gather(
+            client.models.list(),
+            get_anonymous_github_client().warm_up(),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                # Warm-up is best effort; the first real request simply pays the handshake instead
+                logger.debug("Connection warm-up failed: %s", result)
+
+    async def warm_github_client(github_client):
+        """Open a user's GitHub API connection ahead of their first request, best effort."""
+        try:
+            with hold_github_client(github_client):
+                await github_client.warm_up()
+        except Exception as e:
+            logger.debug("GitHub client warm-up failed: %s", e)
+
+    @app.on_event("shutdown")
+    async def close_github_http():
+        """Close the pooled GitHub OAuth HTTP client and every GitHub API client."""
+        await github_http.aclose()
+        await close_github_clients(app)
+
+    # In-memory session stores (in production, use Redis or database). Entries expire, so
+    # abandoned OAuth flows and stale tokens don't accumulate: OAuth state lives for the
+    # length of a login, tokens as long as the session cookie.
+    oauth_sessions = TTLStore(ttl=OAUTH_STATE_TTL)
+    user_tokens = TTLStore(ttl=SESSION_TTL)
 
     # Store user tokens in app state so dependencies can access them
     app.state.user_tokens = user_tokens
 
-    def get_user_token(request: Request) -> Optional[str]:
-        """Extract user token from session/cookies."""
-        session_id = request.cookies.get("session_id")
-        logger.info(f"🔍 Session ID from cookie: {'YES' if session_id else 'NO'}")
-        if session_id:
-            logger.info(f"🔍 Session ID: {session_id[:10]}...")
-            logger.info(f"🔍 Token exists for session: {'YES' if session_id in user_tokens else 'NO'}")
-            if session_id in user_tokens:
-                token = user_tokens[session_id]
-                logger.info(f"🔍 Retrieved token starts with: {token[:10]}...")
-                return token
-        return None
+    # Per-token GitHub API clients expire once unused for a session's length and are closed
+    # on eviction (after any request holding them finishes), so ended sessions don't keep
+    # tokens or connection pools alive
+    app.state.github_clients = TTLStore(ttl=SESSION_TTL, max_entries=128, on_evict=close_github_client, sliding=True)
 
     @app.get("/")
     async def index():
@@ -99,11 +159,11 @@ def create_app():
     async def github_callback(code: str, state: str, response: Response):
         """Handle GitHub OAuth callback and exchange code for access token."""
         try:
-            # Verify state parameter
-            if state not in oauth_sessions:
+            # Verify state parameter; each state is single-use
+            session_data = oauth_sessions.pop(state)
+            if session_data is None:
                 raise HTTPException(status_code=400, detail="Invalid state parameter")
 
-            session_data = oauth_sessions[state]
             session_id = session_data["session_id"]
 
             # Exchange code for access token
@@ -115,11 +175,7 @@ def create_app():
                 "state": state
             }
 
-            token_response = requests.post(
-                token_url,
-                data=token_data,
-                headers={"Accept": "application/json"}
-            )
+            token_response = await github_http.post(token_url, data=token_data)
 
             if token_response.status_code != 200:
                 raise HTTPException(status_code=400, detail="Failed to exchange code for token")
@@ -132,13 +188,13 @@ def create_app():
 
             # Store the access token
             user_tokens[session_id] = access_token
-            logger.info(f"🔍 Stored token for session: {session_id[:10]}...")
-
-            # Clean up OAuth session
-            del oauth_sessions[state]
+            logger.info("🔍 Stored token for session: %s...", session_id[:10])
 
-            # Create redirect response
-            redirect_response = RedirectResponse(url="/?auth=success")
+            # Create redirect response; the user's GitHub client opens its connection while the browser follows it
+            redirect_response = RedirectResponse(
+                url="/?auth=success",
+                background=BackgroundTask(warm_github_client, github_client_for_token(app, access_token)),
+            )
 
             # Set the session cookie on the redirect response
             redirect_response.set_cookie(
@@ -147,18 +203,17 @@ def create_app():
                 httponly=True,
                 secure=False,  # Set to True in production with HTTPS
                 samesite="lax",
-                max_age=3600,  # 1 hour
+                max_age=SESSION_TTL,  # 1 hour
                 path="/"  # Ensure cookie is available for all paths
             )
-            logger.info(f"🔍 Setting session cookie: {session_id[:10]}... on redirect response")
+            logger.info("🔍 Setting session cookie: %s... on redirect response", session_id[:10])
 
             return redirect_response
 
         except Exception as e:
-            logger.error(f"❌ GitHub OAuth error: {e}")
+            logger.error("❌ GitHub OAuth error: %s", e)
             # Clean up OAuth session
-            if state in oauth_sessions:
-                del oauth_sessions[state]
+            oauth_sessions.pop(state)
 
             return RedirectResponse(url=f"/?auth=error&message={str(e)}")
 
@@ -172,33 +227,32 @@ def create_app():
 
         try:
             # Test the token by making a request to GitHub API
-            headers = {"Authorization": f"token {access_token}"}
-            response = requests.get("https://api.github.com/user", headers=headers)
-
-            if response.status_code == 200:
-                user_data = response.json()
-                return JSONResponse(content={
-                    "authenticated": True,
-                    "username": user_data.get("login"),
-                    "name": user_data.get("name")
-                })
-            else:
-                # Token is invalid, remove it
-                session_id = request.cookies.get("session_id")
-                if session_id and session_id in user_tokens:
-                    del user_tokens[session_id]
-                return JSONResponse(content={"authenticated": False})
+            with hold_github_client(github_client_for_token(app, access_token)) as github_client:
+                user_data = await github_client.get_authenticated_user()
+            return JSONResponse(content={
+                "authenticated": True,
+                "username": user_data.get("login"),
+                "name": user_data.get("name")
+            })
+
+        except GithubException:
+            # Token is invalid, remove it
+            session_id = request.cookies.get("session_id")
+            if session_id:
+                user_tokens.pop(session_id)
+            discard_github_client(request, access_token)
+            return JSONResponse(content={"authenticated": False})
 
         except Exception as e:
-            logger.error(f"Error checking auth status: {e}")
+            logger.error("Error checking auth status: %s", e)
             return JSONResponse(content={"authenticated": False})
 
     @app.post("/auth/logout")
     async def logout(request: Request, response: Response):
         """Logout user and clear their stored token."""
         session_id = request.cookies.get("session_id")
-        if session_id and session_id in user_tokens:
-            del user_tokens[session_id]
+        if session_id:
+            discard_github_client(request, user_tokens.pop(session_id))
 
         # Clear session cookie
         response.delete_cookie("session_id")
@@ -212,8 +266,26 @@ def create_app():
     return app
 
 
-app = create_app()
+def __getattr__(name):
+    """
+    Build the module-level app on first access (e.g. `uvicorn main:app`), so importing main
+    doesn't set up logging, the OpenAI client and LLM Observability as a side effect.
+    """
+    if name == "app":
+        app = globals()["app"] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+
+    # Each worker builds its own app through the factory. OAuth state and session tokens are
+    # per process, so more than one worker needs sticky sessions in front of it.
+    uvicorn.run(
+        "main:create_app",
+        factory=True,
+        host="0.0.0.0",
+        port=8000,
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+    )
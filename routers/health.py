@@ -1,19 +1,11 @@
 from datetime import datetime, timezone
 
 from fastapi import APIRouter
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse
 
 router = APIRouter()
 
 
-@router.get("/")
-async def index():
-    """
-    Serve the frontend HTML page.
-    """
-    return FileResponse("frontend/index.html")
-
-
 @router.get("/health")
 async def health_check():
     """
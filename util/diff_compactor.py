@@ -0,0 +1,80 @@
+"""Shrink unified diffs before they are embedded in LLM prompts."""
+
+import re
+from typing import List
+
+_FILE_HEADER = re.compile(r"^diff --git ", re.MULTILINE)
+
+
+def compact_diff(diff: str, max_lines_per_hunk: int = 40) -> str:
+    """
+    Compact a unified diff while keeping its structure readable.
+
+    File headers and '@@' hunk markers are always kept. Hunks whose changes are
+    whitespace-only are dropped, and hunk bodies longer than max_lines_per_hunk
+    keep only their first and last lines around an elision marker.
+
+    Args:
+        diff: Unified diff text (e.g. `git diff` output)
+        max_lines_per_hunk: Maximum body lines kept per hunk
+
+    Returns:
+        The compacted diff
+    """
+    starts = [match.start() for match in _FILE_HEADER.finditer(diff)]
+    if not starts:
+        return diff
+
+    # Anything before the first file header (e.g. a commit preamble) is kept as-is
+    parts = [diff[:starts[0]]] if starts[0] else []
+    for start, end in zip(starts, starts[1:] + [len(diff)]):
+        parts.append(_compact_file(diff[start:end], max_lines_per_hunk))
+    return "".join(parts)
+
+
+def _compact_file(file_diff: str, max_lines_per_hunk: int) -> str:
+    """
+    Compact the hunks of a single file's diff.
+    """
+    lines = file_diff.splitlines(keepends=True)
+    output: List[str] = []
+    hunk: List[str] = []
+
+    def flush() -> None:
+        if hunk:
+            output.extend(_compact_hunk(hunk, max_lines_per_hunk))
+            hunk.clear()
+
+    for line in lines:
+        if line.startswith("@@"):
+            flush()
+            hunk.append(line)
+        elif hunk:
+            hunk.append(line)
+        else:
+            # File header lines (diff --git, index, ---/+++)
+            output.append(line)
+    flush()
+
+    return "".join(output)
+
+
+def _compact_hunk(hunk: List[str], max_lines_per_hunk: int) -> List[str]:
+    """
+    Drop a whitespace-only hunk or truncate a long one to its head and tail.
+    """
+    header, body = hunk[0], hunk[1:]
+
+    removed = [line[1:] for line in body if line.startswith("-")]
+    added = [line[1:] for line in body if line.startswith("+")]
+    if removed or added:
+        if "".join(removed).split() == "".join(added).split():
+            return []
+
+    if len(body) <= max_lines_per_hunk:
+        return hunk
+
+    head = max_lines_per_hunk // 2
+    tail = max_lines_per_hunk - head
+    elided = len(body) - head - tail
+    return [header, *body[:head], f"... {elided} lines elided ...\n", *body[len(body) - tail:]]
@@ -1,4 +1,5 @@
 import logging
+import re
 from dataclasses import dataclass
 from typing import Optional
 from urllib.parse import urljoin
@@ -17,10 +18,15 @@ class DocSection:
     def to_prompt(self) -> str:
         """Convert the documentation section into a prompt string format.
 
+        Whitespace is normalized (trailing spaces stripped, blank-line runs collapsed) so the
+        same documentation always renders byte-for-byte identically, keeping prompt prefixes cacheable.
+
         Returns:
             A formatted string containing the title and content of the section.
         """
-        return f"{self.title}\n\n{self.content}"
+        content = "\n".join(line.rstrip() for line in self.content.strip().splitlines())
+        content = re.sub(r"\n{3,}", "\n\n", content)
+        return f"{self.title.strip()}\n\n{content}"
 
 class DocumentRetriever:
     """Retrieves and parses documentation from Datadog's website."""
@@ -53,7 +59,7 @@ class DocumentRetriever:
             response.raise_for_status()
             return response.text
         except requests.RequestException as e:
-            self.logger.error(f"Failed to fetch documentation from {url}: {str(e)}")
+            self.logger.error("Failed to fetch documentation from %s: %s", url, e)
             return None
 
     def _extract_main_content(self, soup: BeautifulSoup, url: str) -> Optional[DocSection]:
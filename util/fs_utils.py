@@ -0,0 +1,37 @@
+"""Filesystem helpers shared across the application."""
+
+import logging
+import os
+import shutil
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+def discard_directory(path: str) -> None:
+    """
+    Remove a directory without blocking the caller on the recursive delete.
+
+    The directory is renamed to a sibling path (a metadata-only operation), so
+    the original path is free immediately, and the renamed tree is deleted on a
+    daemon thread. Falls back to a synchronous delete if the rename fails.
+
+    Args:
+        path: Directory to remove
+    """
+    trash_path = f"{path.rstrip(os.sep)}.del.{os.getpid()}.{uuid.uuid4().hex[:8]}"
+
+    try:
+        os.rename(path, trash_path)
+    except OSError as e:
+        logger.debug("Could not rename %s for background removal, deleting in place: %s", path, e)
+        shutil.rmtree(path)
+        return
+
+    threading.Thread(
+        target=shutil.rmtree,
+        args=(trash_path,),
+        kwargs={"ignore_errors": True},
+        daemon=True,
+    ).start()
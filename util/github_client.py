@@ -1,15 +1,48 @@
+import asyncio
+import fcntl
+import functools
 import logging
 import os
-import shutil
+import random
+import tempfile
+import threading
 import time
-from typing import Any, Dict, List, Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 
-from git import Repo
+import httpx
+import orjson
 from github import Github
 from github.GithubException import GithubException
 
 from llm.function_instrumenter import InstrumentationResult
 from llm.pr_description_generator import PRDescription, PRDescriptionGenerator
+from util.fs_utils import discard_directory
+
+
+@functools.lru_cache(maxsize=1024)
+def _normalize_repo(repository: str) -> str:
+    """
+    Reduce a repository reference to 'owner/repo'.
+
+    Accepts 'owner/repo', HTTPS URLs (with or without '.git' or a trailing slash)
+    and SSH remotes such as 'git@github.com:owner/repo.git'.
+
+    Args:
+        repository: Repository reference
+
+    Returns:
+        The repository name in 'owner/repo' format
+    """
+    name = repository.strip().rstrip("/")
+    if name.endswith(".git"):
+        name = name[:-4]
+    if "://" in name:
+        name = name.split("://", 1)[1].split("/", 1)[-1]
+    elif name.startswith("git@"):
+        name = name.split(":", 1)[-1]
+    return "/".join(name.split("/")[-2:])
 
 
 class GithubClient:
@@ -17,6 +50,18 @@ class GithubClient:
     A client to interact with the Github API with authentication.
     """
 
+    API_BASE_URL = "https://api.github.com"
+    CONDITIONAL_CACHE_SIZE = 256
+    MAX_DIFF_LINES_PER_FILE = 200
+    MAX_RETRIES = 3
+    MAX_RETRY_DELAY = 60.0
+    MIN_REQUEST_INTERVAL = 0.1
+    RETRY_STATUS_CODES = (429, 502, 503, 504)
+    # Repository metadata and contents rarely change within a run; reuse them briefly without any request
+    RESPONSE_TTL = 60.0
+    REPO_CACHE_SIZE = 32
+    MAX_WRITE_WORKERS = 8
+
     def __init__(self, github_token: Optional[str] = None, access_token: Optional[str] = None):
         """
         Initialize the GithubClient with optional authentication.
@@ -26,11 +71,14 @@ class GithubClient:
                          If not provided, will try to get from GITHUB_TOKEN env var.
             access_token: Optional OAuth access token (takes precedence over github_token)
         """
-        # Prioritize OAuth access token over personal access token
+        # Prioritize OAuth access token over personal access token. One token serves PyGithub,
+        # git and REST calls alike, so every layer sees the same repositories.
         self.token = access_token or github_token or os.getenv("GITHUB_TOKEN")
+
         self.logger = logging.getLogger(__name__)
+        self.is_authenticated = bool(self.token)
 
-        if not self.token:
+        if not self.is_authenticated:
             self.logger.warning("No GitHub token provided. Public repositories will work with rate limits. Private repositories will require authentication.")
             self.github = Github()
         else:
@@ -40,13 +88,272 @@ class GithubClient:
                 self.logger.info("Using personal access token for GitHub authentication")
             self.github = Github(self.token)
 
+        # Async REST client for lightweight API calls made directly from request handlers
+        headers = {"Accept": "application/vnd.github+json", "User-Agent": "DD-Instrumenter-Agent/1.0"}
+        if self.token:
+            headers["Authorization"] = f"token {self.token}"
+        self._client = httpx.AsyncClient(
+            base_url=self.API_BASE_URL,
+            headers=headers,
+            timeout=10,
+            # Connection limits live on the transport, since httpx ignores client-level limits when one is given
+            transport=httpx.AsyncHTTPTransport(
+                retries=self.MAX_RETRIES,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=20),
+            ),
+        )
+
+        # Request pacing shared by every call made through this client
+        self._pace_lock = asyncio.Lock()
+        self._next_request_at = 0.0
+
+        # GET responses keyed by (endpoint, params), with the validator to send on the next request
+        self._conditional_cache: "OrderedDict[Tuple, Tuple[str, str, httpx.Response]]" = OrderedDict()
+
+        # Decoded GET bodies keyed by (endpoint, params), reused until they expire
+        self._ttl_cache: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+
+        # PyGithub Repository objects keyed by full name, reused for RESPONSE_TTL; filled from worker threads
+        self._repo_cache: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._repo_cache_lock = threading.Lock()
+
+    def _get_repo(self, full_name: str):
+        """
+        Fetch a repository from the GitHub API, reused for RESPONSE_TTL so the
+        clone and pull request steps share one round trip without pinning a
+        stale default branch.
+
+        Args:
+            full_name: Repository name in 'owner/repo' format
+
+        Returns:
+            The PyGithub Repository object
+        """
+        now = time.monotonic()
+        with self._repo_cache_lock:
+            entry = self._repo_cache.get(full_name)
+            if entry and entry[0] > now:
+                return entry[1]
+
+        repo = self.github.get_repo(full_name)
+
+        with self._repo_cache_lock:
+            self._repo_cache[full_name] = (now + self.RESPONSE_TTL, repo)
+            self._repo_cache.move_to_end(full_name)
+            if len(self._repo_cache) > self.REPO_CACHE_SIZE:
+                self._repo_cache.popitem(last=False)
+        return repo
+
+    async def _make_request(self, method: str, endpoint: str, **kwargs: Any) -> httpx.Response:
+        """
+        Make an asynchronous request to the GitHub REST API.
+
+        GET responses carrying an ETag or Last-Modified header are cached, and later
+        requests for the same resource are sent as conditional requests. A 304 reply
+        returns the cached response. Rate-limited responses (429, or 403 with an
+        exhausted quota or Retry-After) and transient 5xx gateway errors are retried
+        with jittered backoff; dropped connections are retried by the transport.
+
+        Args:
+            method: HTTP method
+            endpoint: API path relative to API_BASE_URL (e.g. "/repos/owner/repo")
+            **kwargs: Additional arguments passed to httpx
+
+        Returns:
+            The successful httpx response
+
+        Raises:
+            GithubException: If GitHub responds with an error status
+        """
+        # Revalidate cached GETs; a 304 doesn't count against the primary rate limit
+        cache_key = None
+        cached = None
+        if method.upper() == "GET":
+            cache_key = (endpoint, tuple(sorted((kwargs.get("params") or {}).items())))
+            cached = self._conditional_cache.get(cache_key)
+            if cached:
+                validator_header, validator, _ = cached
+                kwargs["headers"] = {**(kwargs.get("headers") or {}), validator_header: validator}
+
+        # The client's default headers are merged in by httpx; only per-call extras are passed here
+        extra_headers = kwargs.pop("headers", None)
+
+        for attempt in range(self.MAX_RETRIES + 1):
+            await self._pace()
+            response = await self._client.request(method, endpoint, headers=extra_headers, **kwargs)
+
+            retry_delay = self._retry_delay(response, attempt)
+            if retry_delay is None or attempt == self.MAX_RETRIES:
+                break
+
+            self.logger.warning("GitHub returned %d for %s, retrying in %.1fs", response.status_code, endpoint, retry_delay)
+            await asyncio.sleep(retry_delay)
+
+        if response.status_code == 304 and cached:
+            self._conditional_cache.move_to_end(cache_key)
+            return cached[2]
+
+        if response.is_error:
+            try:
+                data = self._decode_json(response)
+            except ValueError:
+                data = {"message": response.text}
+            raise GithubException(response.status_code, data, dict(response.headers))
+
+        if cache_key:
+            if "ETag" in response.headers:
+                self._cache_response(cache_key, "If-None-Match", response.headers["ETag"], response)
+            elif "Last-Modified" in response.headers:
+                self._cache_response(cache_key, "If-Modified-Since", response.headers["Last-Modified"], response)
+
+        return response
+
+    async def _pace(self) -> None:
+        """
+        Space request starts at least MIN_REQUEST_INTERVAL apart to stay clear of
+        GitHub's secondary rate limits on bursts.
+
+        Each caller reserves its start slot under the lock and waits for it after releasing
+        the lock, so concurrent requests queue for their slots without serializing on the sleep.
+        """
+        async with self._pace_lock:
+            now = time.monotonic()
+            start_at = max(now, self._next_request_at)
+            self._next_request_at = start_at + self.MIN_REQUEST_INTERVAL
+        delay = start_at - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _retry_delay(self, response: httpx.Response, attempt: int) -> Optional[float]:
+        """
+        Work out how long to back off before retrying a rate-limited or transiently failed response.
+
+        Args:
+            response: The response to inspect
+            attempt: Zero-based attempt number, used for exponential backoff
+
+        Returns:
+            Seconds to wait (with jitter) before retrying, or None if the response
+            should not be retried
+        """
+        if response.status_code != 403 and response.status_code not in self.RETRY_STATUS_CODES:
+            return None
+
+        headers = response.headers
+        if "Retry-After" in headers:
+            try:
+                delay = float(headers["Retry-After"])
+            except ValueError:
+                delay = 2.0 ** attempt
+        elif headers.get("X-RateLimit-Remaining") == "0":
+            delay = max(float(headers.get("X-RateLimit-Reset", 0)) - time.time(), 0.0)
+        elif response.status_code in self.RETRY_STATUS_CODES:
+            delay = 2.0 ** attempt
+        else:
+            # A plain 403 is a permissions problem, not a rate limit
+            return None
+
+        if delay > self.MAX_RETRY_DELAY:
+            return None
+
+        return delay + random.uniform(0, 0.25 * delay)
+
+    @staticmethod
+    def _decode_json(response: httpx.Response) -> Any:
+        """
+        Decode a JSON response body with orjson, which parses large tree/contents payloads several times faster.
+
+        The result is kept on the response, so a response served again from the conditional
+        cache after a 304 is not decoded a second time.
+        """
+        try:
+            return response._decoded_json
+        except AttributeError:
+            response._decoded_json = orjson.loads(response.content)
+            return response._decoded_json
+
+    def _cache_response(self, cache_key: Tuple, validator_header: str, validator: str, response: httpx.Response) -> None:
+        """
+        Remember a response with the header needed to revalidate it, evicting the oldest entry when full.
+        """
+        self._conditional_cache[cache_key] = (validator_header, validator, response)
+        self._conditional_cache.move_to_end(cache_key)
+        if len(self._conditional_cache) > self.CONDITIONAL_CACHE_SIZE:
+            self._conditional_cache.popitem(last=False)
+
+    async def _get_json(self, endpoint: str) -> Any:
+        """
+        GET an endpoint and decode its JSON body, serving repeats within RESPONSE_TTL from memory.
+
+        Args:
+            endpoint: API path relative to API_BASE_URL
+
+        Returns:
+            The decoded JSON body (shared between callers, so treat it as read-only)
+        """
+        now = time.monotonic()
+        cached = self._ttl_cache.get(endpoint)
+        if cached and cached[0] > now:
+            return cached[1]
+
+        data = self._decode_json(await self._make_request("GET", endpoint))
+        self._ttl_cache[endpoint] = (now + self.RESPONSE_TTL, data)
+        self._ttl_cache.move_to_end(endpoint)
+        if len(self._ttl_cache) > self.CONDITIONAL_CACHE_SIZE:
+            self._ttl_cache.popitem(last=False)
+        return data
+
+    async def read_repository(self, repository: str) -> Dict[str, Any]:
+        """
+        Fetch repository metadata without blocking the event loop.
+
+        Args:
+            repository: Repository name in 'owner/repo' format or full GitHub URL
+
+        Returns:
+            The repository JSON returned by the GitHub API
+
+        Raises:
+            GithubException: If repository is not found or access is denied
+        """
+        return await self._get_json(f"/repos/{_normalize_repo(repository)}")
+
+    async def warm_up(self) -> None:
+        """
+        Open a pooled connection to the GitHub API ahead of the first real request.
+
+        Uses /rate_limit, which doesn't count against the rate limit.
+        """
+        await self._client.get("/rate_limit")
+
+    async def aclose(self) -> None:
+        """
+        Close the pooled connections of the async REST client. The client can't be used afterwards.
+        """
+        await self._client.aclose()
+
+    async def get_authenticated_user(self) -> Dict[str, Any]:
+        """
+        Fetch the user that owns the client's token.
+
+        Returns:
+            The user JSON returned by the GitHub API
+
+        Raises:
+            GithubException: If the token is invalid or revoked
+        """
+        response = await self._make_request("GET", "/user")
+        return self._decode_json(response)
+
     def clone_repository(self, repository: str, target_dir: str = None) -> str:
         """
         Clone a repository by name/URL, automatically fetching the clone URL.
 
         Args:
             repository: Repository name in 'owner/repo' format or full GitHub URL
-            target_dir: The target folder (defaults to auto-generated hidden folder with timestamp)
+            target_dir: The target folder (defaults to a new, uniquely named hidden folder).
+                        An existing clone of the same repository there is refreshed in place;
+                        anything else there is replaced, since the caller hands the folder over.
 
         Returns:
             The absolute path of the cloned folder
@@ -55,33 +362,95 @@ class GithubClient:
             GithubException: If repository is not found or authentication fails
         """
         try:
-            repo = self.github.get_repo(repository)
+            repo = self._get_repo(_normalize_repo(repository))
             clone_url = repo.clone_url
 
             # Add authentication to clone URL if token is available
             if self.token:
                 clone_url = clone_url.replace('https://', f'https://{self.token}@')
 
-            # Generate random hidden folder name with timestamp if not provided
+            # Create a uniquely named hidden folder if not provided, so concurrent requests (and
+            # worker processes sharing the working directory) never clone into the same one
             if not target_dir:
-                timestamp = int(time.time())
-                target_dir = f".dir_{timestamp}"
-
-            if os.path.exists(target_dir):
-                shutil.rmtree(target_dir)
-
-            Repo.clone_from(clone_url, target_dir)
-            self.logger.debug(f"Successfully cloned repository {repository} to {target_dir}")
+                target_dir = tempfile.mkdtemp(prefix=".dir_", dir=".")
+                self._clone_fresh(clone_url, target_dir)
+            else:
+                # An explicit target may hold a previous clone: serialize access to it and
+                # fetch only new objects when it already tracks this repository
+                with open(f"{target_dir.rstrip(os.sep)}.lock", "w") as lock_file:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                    if self._refresh_existing_clone(target_dir, clone_url, repo.default_branch):
+                        self.logger.debug("Refreshed existing clone of %s in %s", repository, target_dir)
+                    else:
+                        if os.path.exists(target_dir):
+                            # The caller's own folder, held exclusively through the lock
+                            discard_directory(target_dir)
+                        self._clone_fresh(clone_url, target_dir)
+
+            self.logger.debug("Successfully cloned repository %s to %s", repository, target_dir)
 
             return os.path.abspath(target_dir)
 
         except GithubException as e:
-            self.logger.error(f"Failed to fetch repository {repository}: {str(e)}")
+            self.logger.error("Failed to fetch repository %s: %s", repository, e)
             raise
         except Exception as e:
-            self.logger.error(f"Failed to clone repository: {str(e)}")
+            self.logger.error("Failed to clone repository: %s", e)
             raise
 
+    def _clone_fresh(self, clone_url: str, target_dir: str) -> None:
+        """
+        Clone the repository into target_dir.
+
+        Args:
+            clone_url: Clone URL, including credentials if required
+            target_dir: The target folder, which must be missing or empty
+        """
+        from git import GitCommandError, Repo
+
+        # Only the default branch tip is instrumented, so skip history, other branches and tags.
+        # A blobless filter wouldn't help here: the checkout needs every blob at the tip anyway.
+        try:
+            Repo.clone_from(clone_url, target_dir, depth=1, single_branch=True, no_tags=True)
+        except GitCommandError as e:
+            # Older git versions and some servers reject these options; fall back to a plain clone
+            self.logger.warning("Shallow clone failed, retrying with a full clone: %s", e)
+            if os.path.exists(target_dir):
+                # Only the failed attempt's partial checkout is removed; the folder is kept reserved
+                discard_directory(target_dir)
+                os.makedirs(target_dir)
+            Repo.clone_from(clone_url, target_dir)
+
+    def _refresh_existing_clone(self, target_dir: str, clone_url: str, branch: str) -> bool:
+        """
+        Bring an existing clone of the same repository up to date with the remote branch.
+
+        Args:
+            target_dir: Folder that may contain a previous clone
+            clone_url: Clone URL the existing clone must have been made from
+            branch: Branch to fetch and reset to
+
+        Returns:
+            True if the existing clone was refreshed, False if a fresh clone is needed
+        """
+        from git import Repo
+
+        if not os.path.isdir(os.path.join(target_dir, ".git")):
+            return False
+
+        try:
+            repo = Repo(target_dir)
+            if repo.remotes.origin.url != clone_url:
+                return False
+
+            repo.remotes.origin.fetch(branch, depth=1)
+            repo.git.checkout("-f", "-B", branch, "FETCH_HEAD")
+            repo.git.clean("-fdx")
+            return True
+        except Exception as e:
+            self.logger.warning("Could not refresh existing clone in %s, re-cloning: %s", target_dir, e)
+            return False
+
     def _create_branch_and_commit(
         self,
         repo_path: str,
@@ -97,6 +466,8 @@ class GithubClient:
             file_changes: Dictionary mapping file names to their new contents
             commit_message: Commit message for the changes
         """
+        from git import Repo
+
         try:
             # Initialize git repo
             repo = Repo(repo_path)
@@ -104,26 +475,31 @@ class GithubClient:
             # Create and checkout new branch
             new_branch = repo.create_head(branch_name)
             new_branch.checkout()
-            self.logger.debug(f"Created and checked out branch: {branch_name}")
+            self.logger.debug("Created and checked out branch: %s", branch_name)
 
             # Write the changed files
-            for filename, content in file_changes.items():
-                file_path = os.path.join(repo_path, filename)
+            file_paths = {filename: os.path.join(repo_path, filename) for filename in file_changes}
+
+            # Create each target directory once, even when several files share it
+            for directory in {os.path.dirname(file_path) for file_path in file_paths.values()}:
+                os.makedirs(directory, exist_ok=True)
 
-                # Create directory if it doesn't exist
-                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            def write_file(filename: str) -> None:
+                with open(file_paths[filename], "w", encoding="utf-8") as f:
+                    f.write(file_changes[filename])
+                self.logger.debug("Updated file: %s", filename)
 
-                with open(file_path, "w", encoding="utf-8") as f:
-                    f.write(content)
-                self.logger.debug(f"Updated file: {filename}")
+            with ThreadPoolExecutor(max_workers=self.MAX_WRITE_WORKERS) as executor:
+                # Consume the results so any write error propagates
+                list(executor.map(write_file, file_changes))
 
-            # Stage all changes
-            repo.git.add(A=True)
+            # Stage only the files we wrote instead of rescanning the whole working tree
+            repo.index.add([os.path.join(repo_path, filename) for filename in file_changes])
 
             # Commit changes
             repo.index.commit("Instrumented with Datadog")
         except Exception as e:
-            self.logger.error(f"Git operation failed: {str(e)}")
+            self.logger.error("Git operation failed: %s", e)
             raise
 
     def _push_branch(self, repo_path: str, branch_name: str) -> None:
@@ -134,14 +510,16 @@ class GithubClient:
             repo_path: Path to the git repository
             branch_name: Name of the branch to push
         """
+        from git import Repo
+
         try:
             repo = Repo(repo_path)
             origin = repo.remote(name="origin")
             origin.push(branch_name, set_upstream=True)
-            self.logger.debug(f"Pushed branch {branch_name} to origin")
+            self.logger.debug("Pushed branch %s to origin", branch_name)
 
         except Exception as e:
-            self.logger.error(f"Failed to push branch: {str(e)}")
+            self.logger.error("Failed to push branch: %s", e)
             raise
 
     def _create_pull_request(
@@ -170,11 +548,8 @@ class GithubClient:
             Dictionary containing PR information
         """
         try:
-            if not self.token:
-                raise Exception("GitHub token required for creating pull requests")
-
             # Get the repository and use its default branch
-            repo = self.github.get_repo(f"{repo_owner}/{repo_name}")
+            repo = self._get_repo(f"{repo_owner}/{repo_name}")
             base_branch = repo.default_branch
 
             # Build documentation section if URLs are provided
@@ -212,7 +587,7 @@ class GithubClient:
                 base=base_branch,
             )
 
-            self.logger.debug(f"Created pull request: {pr.html_url}")
+            self.logger.debug("Created pull request: %s", pr.html_url)
 
             return {
                 "pr_url": pr.html_url,
@@ -223,16 +598,17 @@ class GithubClient:
             }
 
         except GithubException as e:
-            self.logger.error(f"GitHub API error creating pull request: {str(e)}")
+            self.logger.error("GitHub API error creating pull request: %s", e)
             # Re-raise with specific GitHub error info
             raise
         except Exception as e:
-            self.logger.error(f"Failed to create pull request: {str(e)}")
+            self.logger.error("Failed to create pull request: %s", e)
             raise
 
     def _get_git_diff(self, repo_path: str, base_branch: str) -> str:
         """
-        Get git diff between current branch and base branch.
+        Get git diff between current branch and base branch, truncated to
+        MAX_DIFF_LINES_PER_FILE lines per file.
 
         Args:
             repo_path: Path to the git repository
@@ -241,19 +617,45 @@ class GithubClient:
         Returns:
             String containing the git diff output
         """
+        from git import Repo
+
         try:
             repo = Repo(repo_path)
 
-            # Get diff between base branch and current branch
-            diff = repo.git.diff(f"{base_branch}...HEAD")
+            # Stream the diff between base branch and current branch so memory is bounded
+            # by the per-file line cap rather than the full patch size
+            process = repo.git.diff(f"{base_branch}...HEAD", as_process=True)
+
+            diff_lines = []
+            file_lines = 0
+            truncated = 0
+            for raw_line in process.stdout:
+                line = raw_line.decode("utf-8", errors="replace").rstrip("\n")
+
+                if line.startswith("diff --git "):
+                    if truncated:
+                        diff_lines.append(f"... {truncated} more lines truncated ...")
+                    file_lines = 0
+                    truncated = 0
+
+                if file_lines < self.MAX_DIFF_LINES_PER_FILE:
+                    diff_lines.append(line)
+                    file_lines += 1
+                else:
+                    truncated += 1
+
+            if truncated:
+                diff_lines.append(f"... {truncated} more lines truncated ...")
 
-            return diff
+            process.wait()
+
+            return "\n".join(diff_lines)
 
         except Exception as e:
-            self.logger.error(f"Failed to get git diff: {str(e)}")
+            self.logger.error("Failed to get git diff: %s", e)
             raise
 
-    def generate_pull_request(
+    async def generate_pull_request(
         self,
         repo_path: str,
         repo_owner: str,
@@ -278,43 +680,44 @@ class GithubClient:
         Returns:
             Dictionary containing PR information and status
         """
-        try:
-            # Get repository and its default branch
-            repo_github = self.github.get_repo(f"{repo_owner}/{repo_name}")
-            base_branch = repo_github.default_branch
+        # Fail before any git or LLM work when the pull request could never be created
+        if not self.is_authenticated:
+            raise Exception("GitHub token required for creating pull requests")
 
+        try:
             # Generate branch name if not provided
             if not branch_name:
                 timestamp = int(time.time())
                 branch_name = f"feature/dd-instrument-{timestamp}"
 
-
             # Extract file changes from instrumentation result
             file_changes = instrumentation_result.file_changes
 
-            # Create branch and commit changes first
-            self.logger.debug(f"Creating branch {branch_name} and committing changes...")
-            self._create_branch_and_commit(
-                repo_path, branch_name, file_changes
+            # Blocking PyGithub/git calls run in worker threads. Steps that don't depend on each
+            # other are overlapped: the repository lookup (GitHub API) with the local commit, and
+            # the push with the PR description (LLM call), which only needs the diff.
+            self.logger.debug("Creating branch %s and committing changes...", branch_name)
+            repo_github, _ = await asyncio.gather(
+                asyncio.to_thread(self._get_repo, f"{repo_owner}/{repo_name}"),
+                asyncio.to_thread(self._create_branch_and_commit, repo_path, branch_name, file_changes),
             )
+            base_branch = repo_github.default_branch
 
             # Get git diff for better context
             self.logger.debug("Getting git diff for PR description generation...")
-            git_diff = self._get_git_diff(repo_path, base_branch)
+            git_diff = await asyncio.to_thread(self._get_git_diff, repo_path, base_branch)
 
-            # Generate PR description using the actual diff
-            self.logger.debug("Generating PR description from git diff...")
-            pr_description = pr_generator.generate_description_from_diff(
-                git_diff, list(file_changes.keys())
+            # Generate PR description using the actual diff while the branch is pushed
+            self.logger.debug("Generating PR description from git diff and pushing branch to remote...")
+            pr_description, _ = await asyncio.gather(
+                pr_generator.generate_description_from_diff(git_diff, list(file_changes.keys())),
+                asyncio.to_thread(self._push_branch, repo_path, branch_name),
             )
 
-            # Push branch to remote
-            self.logger.debug("Pushing branch to remote...")
-            self._push_branch(repo_path, branch_name)
-
             # Create pull request
             self.logger.debug("Creating pull request...")
-            pr_info = self._create_pull_request(
+            pr_info = await asyncio.to_thread(
+                self._create_pull_request,
                 repo_owner, repo_name, branch_name, pr_description,
                 docs_urls=instrumentation_result.docs_urls, runtime=runtime,
                 next_steps=instrumentation_result.next_steps
@@ -328,5 +731,5 @@ class GithubClient:
             }
 
         except Exception as e:
-            self.logger.error(f"Failed to generate pull request: {str(e)}")
+            self.logger.error("Failed to generate pull request: %s", e)
             raise
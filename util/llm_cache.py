@@ -0,0 +1,118 @@
+"""Persistent cache of deterministic LLM completions."""
+
+import functools
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Resolved once at import, like the other environment lookups
+_LLM_CACHE_DIR = os.path.expanduser(os.environ.get("LLM_CACHE_DIR", "~/.cache/dd-instrumenter"))
+_LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE", "on").lower() not in ("off", "0", "false")
+_LLM_CACHE_TTL = float(os.environ.get("LLM_CACHE_TTL", 7 * 24 * 3600))
+
+
+class LLMResponseCache:
+    """
+    SQLite-backed map from completion request to response text.
+
+    Keys hash the full rendered prompt, so editing a prompt template invalidates
+    its entries automatically; bump CACHE_VERSION when the key or value format changes.
+    Responses are zlib-compressed (they are mostly repeated source code) and expire after ttl seconds.
+    """
+
+    CACHE_VERSION = "1"
+
+    def __init__(self, path: str, ttl: float = _LLM_CACHE_TTL):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path: Path of the SQLite database file
+            ttl: Seconds an entry stays valid
+        """
+        self.ttl = ttl
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # One connection shared across threads, serialized by the lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response BLOB NOT NULL, created_at INTEGER NOT NULL)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def make_key(self, model: str, prompt: str, params: Dict[str, Any]) -> str:
+        """
+        Build the cache key for a completion request.
+
+        Args:
+            model: Model name
+            prompt: Rendered prompt
+            params: Extra completion parameters that affect the output (e.g. response_format)
+
+        Returns:
+            Hex digest identifying the request
+        """
+        digest = hashlib.sha256()
+        digest.update(f"{self.CACHE_VERSION}\0{model}\0".encode())
+        digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+        digest.update(b"\0")
+        digest.update(prompt.encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response.
+
+        Args:
+            key: Key from make_key
+
+        Returns:
+            The cached response text, or None on a miss
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and time.time() - row[1] > self.ttl:
+                # Purge expired entries lazily, on access
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+        return zlib.decompress(row[0]).decode("utf-8") if row else None
+
+    def set(self, key: str, response: str) -> None:
+        """
+        Store a response.
+
+        Args:
+            key: Key from make_key
+            response: Completion text to store
+        """
+        compressed = zlib.compress(response.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created_at) VALUES (?, ?, ?)",
+                (key, compressed, int(time.time())),
+            )
+            self._conn.commit()
+
+
+@functools.lru_cache(maxsize=1)
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """
+    Return the process-wide LLM response cache, or None if caching is disabled or unavailable.
+    """
+    if not _LLM_CACHE_ENABLED:
+        return None
+
+    try:
+        return LLMResponseCache(os.path.join(_LLM_CACHE_DIR, "llm.sqlite3"))
+    except (OSError, sqlite3.Error) as e:
+        logger.warning("LLM response cache unavailable, continuing without it: %s", e)
+        return None
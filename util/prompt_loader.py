@@ -1,73 +1,95 @@
 """Utility for loading and formatting prompt templates."""
 
-import json
-import re
+import functools
+import os
+import string
 from pathlib import Path
-from typing import Any
+from typing import Any, Dict, Optional, Tuple
 
 
-def load_prompt_template(template_name: str, **kwargs: Any) -> str:
-    """
-    Load a prompt template from the prompts directory and format it with provided variables.
+# Prompts live in the project root (parent of the util directory)
+PROMPTS_DIR = Path(__file__).parent.parent / "prompts"
 
-    Args:
-        template_name: Name of the template file (without .md extension)
-        **kwargs: Variables to substitute in the template
+# Development aid: re-read templates edited on disk instead of caching them for the process lifetime
+_PROMPT_RELOAD = os.environ.get("PROMPT_RELOAD", "off").lower() in ("on", "1", "true")
 
-    Returns:
-        Formatted prompt string
+_FORMATTER = string.Formatter()
+_CONVERSIONS = {"r": repr, "s": str, "a": ascii}
+_template_mtimes: Dict[str, float] = {}
 
-    Raises:
-        FileNotFoundError: If template file doesn't exist
-        KeyError: If required template variables are missing
-    """
-    # Get the project root directory (parent of util directory)
-    current_dir = Path(__file__).parent
-    project_root = current_dir.parent
-    template_path = project_root / "prompts" / f"{template_name}.md"
+
+@functools.lru_cache(maxsize=32)
+def _read_template(template_name: str) -> str:
+    """Read a prompt template from disk once; templates are static for the process lifetime."""
+    template_path = PROMPTS_DIR / f"{template_name}.md"
 
     if not template_path.exists():
         raise FileNotFoundError(f"Prompt template not found: {template_path}")
 
     with open(template_path, 'r', encoding='utf-8') as f:
-        template_content = f.read()
+        return f.read()
+
+
+@functools.lru_cache(maxsize=32)
+def _compile_template(template_name: str) -> Tuple[Tuple[str, Optional[str], Optional[str], str], ...]:
+    """
+    Parse a template's str.format syntax once into (literal, field, conversion, spec) segments,
+    so rendering is a straight join instead of a re-parse on every call.
+    """
+    return tuple(_FORMATTER.parse(_read_template(template_name)))
+
 
+def _reload_if_modified(template_name: str) -> None:
+    """Drop the cached templates if this one changed on disk since it was last loaded."""
     try:
-        return template_content.format(**kwargs)
-    except KeyError as e:
-        raise KeyError(f"Missing required template variable: {e}")
+        mtime = (PROMPTS_DIR / f"{template_name}.md").stat().st_mtime
+    except OSError:
+        # Let _read_template report the missing file
+        return
+    if _template_mtimes.setdefault(template_name, mtime) != mtime:
+        _template_mtimes[template_name] = mtime
+        _read_template.cache_clear()
+        _compile_template.cache_clear()
 
 
-def parse_json_response(response_text: str) -> dict:
+def preload_prompt_templates() -> None:
+    """
+    Read and compile every template in PROMPTS_DIR, so the first request doesn't pay for disk reads.
     """
-    Parse JSON from LLM response, handling markdown code blocks.
+    for template_path in PROMPTS_DIR.glob("*.md"):
+        _compile_template(template_path.stem)
+
+
+def load_prompt_template(template_name: str, **kwargs: Any) -> str:
+    """
+    Load a prompt template from the prompts directory and format it with provided variables.
 
     Args:
-        response_text: Raw response from LLM
+        template_name: Name of the template file (without .md extension)
+        **kwargs: Variables to substitute in the template
 
     Returns:
-        Parsed JSON dictionary
+        Formatted prompt string
 
     Raises:
-        json.JSONDecodeError: If JSON cannot be parsed
+        FileNotFoundError: If template file doesn't exist
+        KeyError: If required template variables are missing
     """
-    # Remove markdown code block markers if present
-    text = response_text.strip()
-    if text.startswith("```json"):
-        text = text[7:]  # Remove ```json
-    elif text.startswith("```"):
-        text = text[3:]   # Remove ```
+    if _PROMPT_RELOAD:
+        _reload_if_modified(template_name)
 
-    if text.endswith("```"):
-        text = text[:-3]  # Remove closing ```
+    parts = []
+    try:
+        for literal, field_name, conversion, format_spec in _compile_template(template_name):
+            parts.append(literal)
+            if field_name is None:
+                continue
+            value = _FORMATTER.get_field(field_name, (), kwargs)[0]
+            if conversion:
+                value = _CONVERSIONS[conversion](value)
+            parts.append(format(value, format_spec or ""))
+    except KeyError as e:
+        raise KeyError(f"Missing required template variable: {e}")
 
-    text = text.strip()
+    return "".join(parts)
 
-    try:
-        return json.loads(text)
-    except json.JSONDecodeError:
-        # Fallback: try to extract JSON from anywhere in the response
-        json_match = re.search(r'\{.*\}', text, re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group())
-        raise
@@ -1,6 +1,7 @@
 import glob
 import os
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
 
 from util.document import Document
 
@@ -10,6 +11,15 @@ class RepoParser:
     A class that encapsulates logic for parsing repository files.
     """
 
+    MAX_READ_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+    # Binary formats are never decodable as UTF-8, so they are skipped without being read
+    BINARY_EXTENSIONS = frozenset({
+        ".png", ".jpg", ".jpeg", ".gif", ".ico", ".webp", ".bmp", ".pdf",
+        ".zip", ".gz", ".tgz", ".tar", ".bz2", ".xz", ".7z", ".jar", ".war", ".whl",
+        ".woff", ".woff2", ".ttf", ".otf", ".eot", ".mp3", ".mp4", ".mov",
+        ".so", ".dylib", ".dll", ".exe", ".bin", ".class", ".pyc", ".o", ".a",
+    })
+
     def read_repository_files(self, repo_path: str, glob_pattern: str = "**/*") -> Dict[str, Any]:
         """
         Read files from the repository directory and build a tree structure.
@@ -24,34 +34,45 @@ class RepoParser:
         try:
             tree = {}
             pattern_path = os.path.join(repo_path, glob_pattern)
+            file_paths = [
+                path for path in glob.glob(pattern_path, recursive=True)
+                if os.path.splitext(path)[1].lower() not in self.BINARY_EXTENSIONS and os.path.isfile(path)
+            ]
 
-            for file_path in glob.glob(pattern_path, recursive=True):
-                if os.path.isfile(file_path):
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-
-                        # Create Document with content and metadata
-                        doc = Document(
-                            page_content=content,
-                            metadata={
-                                'source': file_path,
-                                'filename': os.path.basename(file_path)
-                            }
-                        )
-                        
-                        # Build tree structure
-                        rel_path = os.path.relpath(file_path, repo_path)
-                        self._add_to_tree(tree, rel_path, doc)
-                        
-                    except (UnicodeDecodeError, PermissionError):
-                        # Skip binary files and files we can't read
+            # File reads are I/O bound, so overlap them across a thread pool
+            with ThreadPoolExecutor(max_workers=self.MAX_READ_WORKERS) as executor:
+                for file_path, doc in zip(file_paths, executor.map(self._read_document, file_paths)):
+                    if doc is None:
                         continue
 
+                    # Build tree structure
+                    rel_path = os.path.relpath(file_path, repo_path)
+                    self._add_to_tree(tree, rel_path, doc)
+
             return tree
         except Exception as e:
             raise Exception(f"Failed to read repository files: {str(e)}")
 
+    def _read_document(self, file_path: str) -> Optional[Document]:
+        """
+        Read a single file into a Document, or None if it is binary or unreadable.
+        """
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except (UnicodeDecodeError, PermissionError):
+            # Skip binary files and files we can't read
+            return None
+
+        # Create Document with content and metadata
+        return Document(
+            page_content=content,
+            metadata={
+                'source': file_path,
+                'filename': os.path.basename(file_path)
+            }
+        )
+
     def _add_to_tree(self, tree: Dict[str, Any], path: str, doc: Document) -> None:
         """
         Add a document to the tree structure at the specified path.
@@ -84,3 +105,14 @@ class RepoParser:
         
         traverse(tree)
         return documents
+
+    def build_filename_index(self, tree: Dict[str, Any]) -> Dict[str, Document]:
+        """
+        Build a filename -> Document index for O(1) lookups by basename.
+
+        When several files share a basename, the first one encountered wins.
+        """
+        index = {}
+        for doc in self._get_all_documents(tree):
+            index.setdefault(doc.metadata['filename'], doc)
+        return index
@@ -0,0 +1,146 @@
+"""In-process storage for short-lived session data."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, List, Optional, Tuple
+
+_MISSING = object()
+
+
+class TTLStore:
+    """
+    Dict-like store whose entries expire a fixed number of seconds after they were set.
+
+    Because every entry shares the same TTL, insertion order is expiry order: expired
+    entries are purged from the front on each write, so abandoned entries (e.g. OAuth
+    flows that never complete) can't accumulate. max_entries bounds memory on top of that.
+
+    Entries live in this process only; with several worker processes, requests that share
+    a session must reach the same worker.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_entries: int = 10000,
+        on_evict: Optional[Callable[[Hashable, Any], None]] = None,
+        sliding: bool = False,
+    ):
+        """
+        Create an empty store.
+
+        Args:
+            ttl: Seconds an entry stays valid after it is set
+            max_entries: Maximum number of live entries; the oldest are evicted first
+            on_evict: Optional callback run with (key, value) for every entry the store drops
+                      (expired, over capacity, replaced, deleted or cleared). Entries removed
+                      with pop() are handed back to the caller instead.
+            sliding: Whether get() renews an entry's TTL and marks it most recently used, so
+                     entries expire after ttl seconds without use and capacity evicts the least
+                     recently used first
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.on_evict = on_evict
+        self.sliding = sliding
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        # Sync FastAPI dependencies run in worker threads, so access is serialized
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Return the value for key, or default if it is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            now = time.monotonic()
+            if expires_at > now:
+                if self.sliding:
+                    # Renewing keeps insertion order equal to expiry order
+                    self._entries[key] = (now + self.ttl, value)
+                    self._entries.move_to_end(key)
+                return value
+            del self._entries[key]
+        self._evicted([(key, value)])
+        return default
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Remove key and return its value, or default if it is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is None:
+            return default
+        if entry[0] <= time.monotonic():
+            self._evicted([(key, entry[1])])
+            return default
+        return entry[1]
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        now = time.monotonic()
+        with self._lock:
+            previous = self._entries.get(key)
+            self._entries[key] = (now + self.ttl, value)
+            self._entries.move_to_end(key)
+            evicted = self._purge(now)
+        if previous is not None and previous[1] is not value:
+            evicted.append((key, previous[1]))
+        self._evicted(evicted)
+
+    def __getitem__(self, key: Hashable) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __delitem__(self, key: Hashable) -> None:
+        with self._lock:
+            _, value = self._entries.pop(key)
+        self._evicted([(key, value)])
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def _purge(self, now: float) -> List[Tuple[Hashable, Any]]:
+        """
+        Drop expired entries and any beyond max_entries, oldest first. Caller holds the lock.
+
+        Returns:
+            The dropped (key, value) pairs, for the caller to pass to _evicted once the lock is released
+        """
+        evicted = []
+        while self._entries:
+            key, (expires_at, value) = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self.max_entries:
+                break
+            del self._entries[key]
+            evicted.append((key, value))
+        return evicted
+
+    def _evicted(self, entries: List[Tuple[Hashable, Any]]) -> None:
+        """
+        Run the on_evict callback for dropped entries, outside the lock so it may use the store.
+        """
+        if self.on_evict is None:
+            return
+        for key, value in entries:
+            self.on_evict(key, value)
+
+    def __len__(self) -> int:
+        with self._lock:
+            evicted = self._purge(time.monotonic())
+            size = len(self._entries)
+        self._evicted(evicted)
+        return size
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        with self._lock:
+            evicted = [(key, value) for key, (_, value) in self._entries.items()]
+            self._entries.clear()
+        self._evicted(evicted)